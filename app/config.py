@@ -5,17 +5,92 @@ from dataclasses import dataclass
 @dataclass
 class Settings:
     cam_id: int = int(os.getenv("CAM_ID", "0"))
+    # Device index or stream URL; falls back to cam_id when empty.
+    cam_source: str = os.getenv("CAM_SOURCE", "")
+    # "latest" decodes on a background thread and always serves the newest frame;
+    # "process" decodes in a child process and shares frames through shared memory.
+    capture_mode: str = os.getenv("CAPTURE_MODE", "latest")
+    capture_shm_slots: int = int(os.getenv("CAPTURE_SHM_SLOTS", "8"))
+    # "single" serves cam_id only; "multi" batches every enabled camera.
+    runtime_mode: str = os.getenv("RUNTIME_MODE", "single")
+    # JSON list of {"id", "name", "source"}; when empty cameras come from the backend DB.
+    cameras_file: str = os.getenv("CAMERAS_FILE", "")
+    cameras_db: str = os.getenv("CAMERAS_DB", "backend/fall.db")
+    # Set by the backend supervisor: the cameras this worker owns (comma separated).
+    camera_ids: str = os.getenv("CAMERA_IDS", "")
+    worker_id: str = os.getenv("WORKER_ID", "")
+    heartbeat_sec: float = float(os.getenv("HEARTBEAT_SEC", "5"))
+    # Skip the local window; overlays are drawn only for the preview feed and for events.
+    headless: bool = os.getenv("HEADLESS", "false").lower() == "true"
+    preview_port: int = int(os.getenv("PREVIEW_PORT", "0"))
+    preview_host: str = os.getenv("PREVIEW_HOST", "127.0.0.1")
+    preview_fps: float = float(os.getenv("PREVIEW_FPS", "2"))
+    preview_width: int = int(os.getenv("PREVIEW_WIDTH", "480"))
+    stats_interval_sec: float = float(os.getenv("STATS_INTERVAL_SEC", "30"))
+    # Per-stage latency histograms; dumped on SIGUSR1 and every PROFILE_EXPORT_SEC.
+    profile: bool = os.getenv("PROFILE", "false").lower() == "true"
+    profile_export_sec: float = float(os.getenv("PROFILE_EXPORT_SEC", "60"))
     video_path: str = os.getenv("VIDEO_PATH", "VideoTest/video4.mp4")
     output_path: str = os.getenv("OUTPUT_PATH", "output_fall.mp4")
 
     fall_window: int = int(os.getenv("FALL_WINDOW", "8"))
     aspect_ratio_thres: float = float(os.getenv("ASPECT_RATIO_THRES", "1.4"))
     pose_y_diff: float = float(os.getenv("POSE_Y_DIFF", "0.05"))
+    # "counter" counts suspicious frames; "temporal" also uses hip velocity and torso angle.
+    fall_model: str = os.getenv("FALL_MODEL", "counter")
+
+    # Track every person and keep fall counters per track instead of only the largest box.
+    tracking: bool = os.getenv("TRACKING", "false").lower() == "true"
+    track_iou_thres: float = float(os.getenv("TRACK_IOU_THRES", "0.3"))
+    track_max_missed: int = int(os.getenv("TRACK_MAX_MISSED", "15"))
+
+    # Frames between detections while nothing happens (1 = detect every frame).
+    # Any motion or a rising fall counter switches back to every frame for
+    # DETECT_HOLD_FRAMES frames.
+    detect_idle_interval: int = int(os.getenv("DETECT_IDLE_INTERVAL", "1"))
+    detect_hold_frames: int = int(os.getenv("DETECT_HOLD_FRAMES", "30"))
+
+    # Skip detection while nothing changes inside MOTION_ROI (minus MOTION_MASKS).
+    # Zones are JSON lists of normalised [x1, y1, x2, y2] boxes or [[x, y], ...] polygons.
+    motion_gate: bool = os.getenv("MOTION_GATE", "false").lower() == "true"
+    motion_threshold: int = int(os.getenv("MOTION_THRESHOLD", "25"))
+    motion_min_area: float = float(os.getenv("MOTION_MIN_AREA", "0.002"))
+    motion_roi: str = os.getenv("MOTION_ROI", "")
+    motion_masks: str = os.getenv("MOTION_MASKS", "")
 
     save_before: int = int(os.getenv("SAVE_BEFORE", "60"))
     save_after: int = int(os.getenv("SAVE_AFTER", "90"))
+    # No new event within COOLDOWN_SEC of the last clip ending (per track when tracking);
+    # repeats within MERGE_SEC of an event's start extend its clip instead.
+    cooldown_sec: float = float(os.getenv("COOLDOWN_SEC", "5"))
+    merge_sec: float = float(os.getenv("MERGE_SEC", "30"))
+    # Poll the backend settings version this often (0 = off). Once received, the
+    # backend values take over from the env ones above, without a restart.
+    settings_poll_sec: float = float(os.getenv("SETTINGS_POLL_SEC", "10"))
+    # "raw" keeps full frames for pre-roll; "jpeg" keeps them encoded within BUFFER_BUDGET_MB.
+    buffer_mode: str = os.getenv("BUFFER_MODE", "raw")
+    buffer_budget_mb: float = float(os.getenv("BUFFER_BUDGET_MB", "0"))
+    buffer_jpeg_quality: int = int(os.getenv("BUFFER_JPEG_QUALITY", "85"))
+    # Post-event frames waiting for the clip writer thread; extra frames are dropped.
+    clip_queue_size: int = int(os.getenv("CLIP_QUEUE_SIZE", "120"))
 
     img_dir: str = os.getenv("IMG_DIR", "backend/storage/snapshots")
     vid_dir: str = os.getenv("VID_DIR", "backend/storage/clips")
 
     model_path: str = os.getenv("MODEL_PATH", "yolov8n-pose.pt")
+    # "ultralytics" (PyTorch), "onnx" or "openvino"; export with `python -m app.inference.export`.
+    infer_backend: str = os.getenv("INFER_BACKEND", "ultralytics")
+    infer_imgsz: int = int(os.getenv("INFER_IMGSZ", "640"))
+    infer_threads: int = int(os.getenv("INFER_THREADS", "0"))
+    # "mediapipe" runs a second pose model on the crop; "yolo" reuses the detector keypoints.
+    pose_source: str = os.getenv("POSE_SOURCE", "mediapipe")
+    # Stabilized square crop fed to MediaPipe (pixels per side; 0 = raw detector box).
+    pose_crop_size: int = int(os.getenv("POSE_CROP_SIZE", "256"))
+    pose_crop_expand: float = float(os.getenv("POSE_CROP_EXPAND", "1.25"))
+    pose_crop_alpha: float = float(os.getenv("POSE_CROP_ALPHA", "0.5"))
+
+    def capture_source(self):
+        source = self.cam_source.strip()
+        if not source:
+            return self.cam_id
+        return int(source) if source.isdigit() else source
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 
 
@@ -8,31 +9,115 @@ class EventState:
     recording: bool = False
     after_count: int = 0
     ts: str = ""
+    track_ids: list[int] = field(default_factory=list)
+    started_at: float = 0.0
+    # End of the last clip; -inf until one has finished.
+    ended_at: float = float("-inf")
+    # Repeat detections folded into the current event.
+    merged: int = 0
+    # Detections dropped (cooldown, or repeats past the merge window) since the last event.
+    suppressed: int = 0
 
 
 class FallEventHandler:
-    def __init__(self, save_after: int) -> None:
+    # A repeat detection within merge_sec of the event start extends the clip
+    # being recorded; detections within cooldown_sec after a clip ends are
+    # suppressed. In tracking mode the cooldown is per track, so somebody
+    # else falling still starts an event.
+    def __init__(self, save_after: int, cooldown_sec: float = 0.0, merge_sec: float = 0.0) -> None:
         self.save_after = save_after
+        self.cooldown_sec = cooldown_sec
+        self.merge_sec = merge_sec
         self.state = EventState()
+        self.track_ended_at: dict[int, float] = {}
 
-    def should_start_event(self, fall_detected: bool) -> bool:
-        return fall_detected and not self.state.prev_fall
+    def should_start_event(self, fall_detected: bool, now: float | None = None) -> bool:
+        if not fall_detected or self.state.prev_fall:
+            return False
+        now = time.monotonic() if now is None else now
+        if self.state.recording:
+            self._merge_or_suppress(now)
+            return False
+        if now - self.state.ended_at < self.cooldown_sec:
+            self.state.suppressed += 1
+            return False
+        return True
+
+    def should_start_track_event(self, onset_track_ids, now: float | None = None) -> bool:
+        # While recording, any fresh onset within merge_sec of the event start
+        # joins the clip and restarts its post-roll. Past merge_sec a new track
+        # returns True: the caller ends the current event and starts another.
+        if len(onset_track_ids) == 0:
+            return False
+        now = time.monotonic() if now is None else now
+        fresh = [
+            int(t)
+            for t in onset_track_ids
+            if now - self.track_ended_at.get(int(t), float("-inf")) >= self.cooldown_sec
+        ]
+        self.state.suppressed += len(onset_track_ids) - len(fresh)
+        if not fresh:
+            return False
+        if self.state.recording:
+            if now - self.state.started_at <= self.merge_sec:
+                self.add_tracks(fresh)
+                self.state.after_count = 0
+                self.state.merged += len(fresh)
+                return False
+            if all(t in self.state.track_ids for t in fresh):
+                self.state.suppressed += len(fresh)
+                return False
+        return True
 
-    def start_event(self) -> str:
+    def _merge_or_suppress(self, now: float) -> None:
+        if now - self.state.started_at <= self.merge_sec:
+            # Restart the post-roll so the clip covers the repeat.
+            self.state.after_count = 0
+            self.state.merged += 1
+        else:
+            self.state.suppressed += 1
+
+    def start_event(self, track_ids=(), now: float | None = None) -> str:
         self.state.ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         self.state.recording = True
         self.state.after_count = 0
+        self.state.started_at = time.monotonic() if now is None else now
+        self.state.track_ids = [int(t) for t in track_ids]
+        self.state.merged = 0
         return self.state.ts
 
-    def update_recording(self) -> bool:
+    def add_tracks(self, track_ids) -> None:
+        for t in track_ids:
+            if int(t) not in self.state.track_ids:
+                self.state.track_ids.append(int(t))
+
+    def update_recording(self, now: float | None = None) -> bool:
         if not self.state.recording:
             return False
         self.state.after_count += 1
         if self.state.after_count >= self.save_after:
-            self.state.recording = False
+            self.end_event(now)
             return True
         return False
 
+    def end_event(self, now: float | None = None) -> None:
+        self.state.recording = False
+        self.state.ended_at = time.monotonic() if now is None else now
+        self._prune_tracks(self.state.ended_at)
+        for t in self.state.track_ids:
+            self.track_ended_at[t] = self.state.ended_at
+
+    def take_counts(self) -> dict:
+        # Counts for the event that just finished; suppressions restart from zero.
+        counts = {"merged": self.state.merged, "suppressed": self.state.suppressed}
+        self.state.merged = 0
+        self.state.suppressed = 0
+        return counts
+
+    def _prune_tracks(self, now: float) -> None:
+        for t, ended in list(self.track_ended_at.items()):
+            if now - ended >= self.cooldown_sec:
+                del self.track_ended_at[t]
+
     def set_prev(self, fall_detected: bool) -> None:
         self.state.prev_fall = fall_detected
-
@@ -0,0 +1,170 @@
+import os
+
+import cv2
+import numpy as np
+
+from app.inference.tracker import iou_matrix
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_thres: float) -> np.ndarray:
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while len(order):
+        i = order[0]
+        keep.append(i)
+        if len(order) == 1:
+            break
+        iou = iou_matrix(boxes[i : i + 1], boxes[order[1:]])[0]
+        order = order[1:][iou <= iou_thres]
+    return np.asarray(keep, np.int64)
+
+
+class LetterboxBatch:
+    # Fixed-size, preallocated model input. Frames are resized into a padded
+    # uint8 canvas and converted to NCHW float32 RGB without per-call
+    # allocations; the buffers only grow if a larger batch arrives.
+    def __init__(self, imgsz: int, max_batch: int = 1) -> None:
+        self.imgsz = imgsz
+        self._alloc(max_batch)
+
+    def _alloc(self, n: int) -> None:
+        self.canvas = np.full((n, self.imgsz, self.imgsz, 3), 114, np.uint8)
+        self.tensor = np.zeros((n, 3, self.imgsz, self.imgsz), np.float32)
+
+    def fill(self, frames) -> tuple[np.ndarray, list[tuple[float, float, float, int, int]]]:
+        # Each transform is (scale, pad_x, pad_y, frame_w, frame_h).
+        n = len(frames)
+        if n > len(self.canvas):
+            self._alloc(n)
+        transforms = []
+        for i, frame in enumerate(frames):
+            h, w = frame.shape[:2]
+            scale = min(self.imgsz / h, self.imgsz / w)
+            nh, nw = int(round(h * scale)), int(round(w * scale))
+            top, left = (self.imgsz - nh) // 2, (self.imgsz - nw) // 2
+            self.canvas[i].fill(114)
+            self.canvas[i, top : top + nh, left : left + nw] = cv2.resize(
+                frame, (nw, nh), interpolation=cv2.INTER_LINEAR
+            )
+            transforms.append((scale, left, top, w, h))
+        np.multiply(
+            self.canvas[:n, :, :, ::-1].transpose(0, 3, 1, 2),
+            1.0 / 255.0,
+            out=self.tensor[:n],
+            casting="unsafe",
+        )
+        return self.tensor[:n], transforms
+
+
+def decode_pose_output(
+    output: np.ndarray,
+    transforms,
+    conf: float,
+    iou_thres: float = 0.7,
+    max_det: int = 100,
+):
+    # YOLOv8-pose head: (B, 4 + 1 + K*3, anchors) with cx, cy, w, h, person score, keypoints.
+    from app.inference.detector import Detections
+
+    results = []
+    for pred, (scale, pad_x, pad_y, w, h) in zip(output.transpose(0, 2, 1), transforms):
+        pred = pred[pred[:, 4] >= conf]
+        if len(pred) == 0:
+            results.append(Detections.empty())
+            continue
+        xy, wh = pred[:, 0:2], pred[:, 2:4] / 2
+        boxes = np.concatenate([xy - wh, xy + wh], axis=1)
+        scores = pred[:, 4]
+        keep = nms(boxes, scores, iou_thres)[:max_det]
+        boxes, scores = boxes[keep], scores[keep]
+        kps = pred[keep, 5:].reshape(len(keep), -1, 3).copy()
+
+        offset = np.array([pad_x, pad_y], np.float32)
+        # Clipped to the source frame, like ultralytics does, so all backends
+        # agree on boxes at the frame edge and crops never go negative.
+        limit = np.array([w, h], np.float32)
+        boxes = np.clip((boxes.reshape(-1, 2, 2) - offset) / scale, 0, limit)
+        kps[:, :, :2] = np.clip((kps[:, :, :2] - offset) / scale, 0, limit)
+        results.append(
+            Detections(
+                boxes=boxes.reshape(-1, 4).astype(np.float32),
+                scores=scores.astype(np.float32),
+                keypoints=kps.astype(np.float32),
+            )
+        )
+    return results
+
+
+class UltralyticsBackend:
+    def __init__(self, model_path: str) -> None:
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+
+    def infer_batch(self, frames, conf: float):
+        from app.inference.detector import to_detections
+
+        results = self.model(list(frames), conf=conf, verbose=False)
+        return [to_detections(r) for r in results]
+
+
+class OnnxBackend:
+    def __init__(self, model_path: str, imgsz: int = 640, threads: int = 0) -> None:
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        if threads > 0:
+            opts.intra_op_num_threads = threads
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, sess_options=opts, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.batch = LetterboxBatch(imgsz)
+
+    def infer_batch(self, frames, conf: float):
+        tensor, transforms = self.batch.fill(frames)
+        output = self.session.run(None, {self.input_name: tensor})[0]
+        return decode_pose_output(output, transforms, conf)
+
+
+class OpenVinoBackend:
+    def __init__(self, model_path: str, imgsz: int = 640, threads: int = 0) -> None:
+        import openvino as ov
+
+        core = ov.Core()
+        config = {"INFERENCE_NUM_THREADS": threads} if threads > 0 else {}
+        if os.path.isdir(model_path):
+            model_dir = model_path
+            model_path = next(
+                (os.path.join(model_dir, f) for f in sorted(os.listdir(model_dir)) if f.endswith(".xml")),
+                None,
+            )
+            if model_path is None:
+                raise FileNotFoundError(f"No OpenVINO IR (.xml) in {model_dir}")
+        model = core.read_model(model_path)
+        self.compiled = core.compile_model(model, "CPU", config)
+        self.batch = LetterboxBatch(imgsz)
+        # IRs exported before dynamic=True have a fixed batch of 1.
+        batch_dim = self.compiled.input(0).get_partial_shape()[0]
+        self.fixed_batch = batch_dim.get_length() if batch_dim.is_static else 0
+
+    def infer_batch(self, frames, conf: float):
+        if self.fixed_batch == 1 and len(frames) > 1:
+            out = []
+            for frame in frames:
+                out.extend(self.infer_batch([frame], conf))
+            return out
+        tensor, transforms = self.batch.fill(frames)
+        output = self.compiled(tensor)[self.compiled.output(0)]
+        return decode_pose_output(np.asarray(output), transforms, conf)
+
+
+def make_backend(name: str, model_path: str, imgsz: int = 640, threads: int = 0):
+    if name == "onnx":
+        return OnnxBackend(model_path, imgsz, threads)
+    if name == "openvino":
+        return OpenVinoBackend(model_path, imgsz, threads)
+    if name == "ultralytics":
+        return UltralyticsBackend(model_path)
+    raise ValueError(f"Unknown inference backend {name!r}")
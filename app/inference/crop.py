@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+
+
+class CropStabilizer:
+    # Feeds MediaPipe a steady square window around one person so its
+    # between-frame tracking keeps working: the box is expanded, its centre is
+    # smoothed, the side length only changes when the person clearly grows or
+    # shrinks, and the crop is always resized to the same input size.
+    def __init__(
+        self,
+        out_size: int = 256,
+        expand: float = 1.25,
+        alpha: float = 0.5,
+        resize_margin: float = 0.2,
+        max_missed: int = 5,
+    ) -> None:
+        self.out_size = out_size
+        self.expand = expand
+        self.alpha = alpha
+        self.resize_margin = resize_margin
+        self.max_missed = max_missed
+        self.center: np.ndarray | None = None
+        self.side = 0.0
+        self.missed = 0
+        self.resets = 0
+
+    def reset(self) -> None:
+        self.center = None
+        self.side = 0.0
+        self.missed = 0
+
+    def miss(self) -> None:
+        self.missed += 1
+        if self.missed > self.max_missed:
+            self.reset()
+
+    def update(self, bbox, frame_shape) -> tuple[int, int, int, int]:
+        x1, y1, x2, y2 = bbox
+        center = np.array([(x1 + x2) / 2, (y1 + y2) / 2], np.float64)
+        side = max(x2 - x1, y2 - y1) * self.expand
+        if self.center is None or not self._contains(center):
+            # A different person (or the first frame): start over.
+            if self.center is not None:
+                self.resets += 1
+            self.center = center
+            self.side = side
+        else:
+            self.center += self.alpha * (center - self.center)
+            if abs(side - self.side) > self.resize_margin * self.side:
+                self.side += self.alpha * (side - self.side)
+        self.missed = 0
+        return self._window(frame_shape)
+
+    def _contains(self, point) -> bool:
+        return bool(np.all(np.abs(point - self.center) <= self.side / 2))
+
+    def _window(self, frame_shape) -> tuple[int, int, int, int]:
+        # Always square. The window is shifted back inside the frame rather
+        # than shrunk; when it is larger than the frame it is centred and
+        # crop() pads the part outside, so the window may reach past the edges.
+        h, w = frame_shape[:2]
+        side = max(int(round(self.side)), 1)
+        x1 = int(round(self.center[0] - side / 2))
+        y1 = int(round(self.center[1] - side / 2))
+        x1 = min(max(x1, 0), w - side) if side <= w else (w - side) // 2
+        y1 = min(max(y1, 0), h - side) if side <= h else (h - side) // 2
+        return x1, y1, x1 + side, y1 + side
+
+    def crop(self, frame, window):
+        x1, y1, x2, y2 = window
+        h, w = frame.shape[:2]
+        fx1, fy1, fx2, fy2 = max(x1, 0), max(y1, 0), min(x2, w), min(y2, h)
+        crop = frame[fy1:fy2, fx1:fx2]
+        if crop.size == 0:
+            return crop
+        if (fx1, fy1, fx2, fy2) != (x1, y1, x2, y2):
+            crop = cv2.copyMakeBorder(
+                crop, fy1 - y1, y2 - fy2, fx1 - x1, x2 - fx2, cv2.BORDER_CONSTANT, value=0
+            )
+        if not self.out_size:
+            return crop
+        return cv2.resize(crop, (self.out_size, self.out_size), interpolation=cv2.INTER_AREA)
@@ -1,10 +1,52 @@
-from ultralytics import YOLO
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.inference.backends import make_backend
+
+
+@dataclass
+class Detections:
+    boxes: np.ndarray  # (N, 4) float32 xyxy in frame pixels
+    scores: np.ndarray  # (N,) float32
+    keypoints: np.ndarray | None = None  # (N, K, 3) float32 x, y, conf
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    @classmethod
+    def empty(cls) -> "Detections":
+        return cls(np.zeros((0, 4), np.float32), np.zeros((0,), np.float32), None)
+
+
+def to_detections(result) -> Detections:
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return Detections.empty()
+    keypoints = None
+    if getattr(result, "keypoints", None) is not None and result.keypoints.data is not None:
+        keypoints = result.keypoints.data.cpu().numpy().astype(np.float32)
+    return Detections(
+        boxes=boxes.xyxy.cpu().numpy().astype(np.float32),
+        scores=boxes.conf.cpu().numpy().astype(np.float32),
+        keypoints=keypoints,
+    )
 
 
 class YoloPoseDetector:
-    def __init__(self, model_path: str) -> None:
-        self.model = YOLO(model_path)
+    def __init__(
+        self,
+        model_path: str,
+        backend: str = "ultralytics",
+        imgsz: int = 640,
+        threads: int = 0,
+    ) -> None:
+        self.backend = make_backend(backend, model_path, imgsz, threads)
 
-    def infer(self, frame, conf: float = 0.25):
-        return self.model(frame, conf=conf)[0]
+    def infer(self, frame, conf: float = 0.25) -> Detections:
+        return self.infer_batch([frame], conf=conf)[0]
 
+    def infer_batch(self, frames, conf: float = 0.25) -> list[Detections]:
+        if not frames:
+            return []
+        return self.backend.infer_batch(frames, conf)
@@ -0,0 +1,92 @@
+import argparse
+import glob
+import os
+
+import cv2
+
+from app.inference.backends import LetterboxBatch
+
+
+class FolderCalibrationReader:
+    # Feeds letterboxed frames from a folder of images to ONNX Runtime's
+    # static INT8 calibration.
+    def __init__(self, input_name: str, image_dir: str, imgsz: int, limit: int = 200) -> None:
+        paths = sorted(
+            p
+            for ext in ("*.jpg", "*.jpeg", "*.png")
+            for p in glob.glob(os.path.join(image_dir, ext))
+        )[:limit]
+        if not paths:
+            raise RuntimeError(f"No calibration images in {image_dir}")
+        self.input_name = input_name
+        self.paths = iter(paths)
+        self.batch = LetterboxBatch(imgsz)
+
+    def get_next(self):
+        for path in self.paths:
+            frame = cv2.imread(path)
+            if frame is None:
+                continue
+            tensor, _ = self.batch.fill([frame])
+            return {self.input_name: tensor.copy()}
+        return None
+
+
+def export_onnx(weights: str, imgsz: int) -> str:
+    from ultralytics import YOLO
+
+    # Dynamic axes keep the batch dimension open; callers always feed imgsz x imgsz.
+    return YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+
+
+def quantize_onnx(onnx_path: str, calib_dir: str, imgsz: int) -> str:
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+
+    input_name = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    out_path = onnx_path.replace(".onnx", "-int8.onnx")
+    quantize_static(
+        onnx_path,
+        out_path,
+        FolderCalibrationReader(input_name, calib_dir, imgsz),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+    return out_path
+
+
+def export_openvino(weights: str, imgsz: int, int8: bool, data: str | None) -> str:
+    from ultralytics import YOLO
+
+    # Dynamic batch like the ONNX export: multi-camera mode infers N frames at once.
+    kwargs = {"format": "openvino", "imgsz": imgsz, "int8": int8, "dynamic": True}
+    if int8 and data:
+        kwargs["data"] = data
+    return YOLO(weights).export(**kwargs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export pose weights for CPU inference backends.")
+    parser.add_argument("--weights", default=os.getenv("MODEL_PATH", "yolov8n-pose.pt"))
+    parser.add_argument("--format", choices=("onnx", "openvino"), default="onnx")
+    parser.add_argument("--imgsz", type=int, default=int(os.getenv("INFER_IMGSZ", "640")))
+    parser.add_argument("--int8", action="store_true")
+    parser.add_argument("--calib-dir", help="Folder of sample frames for ONNX INT8 calibration")
+    parser.add_argument("--data", help="Dataset yaml for OpenVINO INT8 calibration")
+    args = parser.parse_args()
+
+    if args.format == "onnx":
+        path = export_onnx(args.weights, args.imgsz)
+        if args.int8:
+            if not args.calib_dir:
+                parser.error("--int8 with --format onnx needs --calib-dir")
+            path = quantize_onnx(path, args.calib_dir, args.imgsz)
+    else:
+        path = export_openvino(args.weights, args.imgsz, args.int8, args.data)
+    print(f"[export] wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,244 @@
 import cv2
+import numpy as np
+
+from app.inference.crop import CropStabilizer
+from app.profiling import profiler
+
+
+# COCO keypoint indices produced by YOLO pose models.
+KP_LEFT_SHOULDER, KP_RIGHT_SHOULDER, KP_LEFT_HIP, KP_RIGHT_HIP = 5, 6, 11, 12
+
+
+def box_ratios(boxes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    wh = boxes[:, 2:4] - boxes[:, 0:2]
+    areas = wh[:, 0] * wh[:, 1]
+    ratios = wh[:, 0] / np.maximum(wh[:, 1], 1)
+    return areas, ratios
+
+
+def largest_per_frame(frame_idx: np.ndarray, areas: np.ndarray, n_frames: int) -> np.ndarray:
+    # Index into the flattened detections of the largest box per frame, -1 if none.
+    best = np.full(n_frames, -1, dtype=np.int64)
+    if len(areas) == 0:
+        return best
+    order = np.lexsort((-areas, frame_idx))
+    starts = np.r_[0, np.flatnonzero(np.diff(frame_idx[order])) + 1]
+    best[frame_idx[order[starts]]] = order[starts]
+    return best
+
+
+def keypoint_pose_dy(keypoints: np.ndarray, boxes: np.ndarray, min_conf: float = 0.3) -> np.ndarray:
+    # Same shoulder-vs-hip measure as the MediaPipe path, with heights normalised
+    # by the box height; NaN where the joints are not visible.
+    shoulder_y = keypoints[:, [KP_LEFT_SHOULDER, KP_RIGHT_SHOULDER], 1].mean(axis=1)
+    hip_y = keypoints[:, [KP_LEFT_HIP, KP_RIGHT_HIP], 1].mean(axis=1)
+    heights = np.maximum(boxes[:, 3] - boxes[:, 1], 1)
+    visible = keypoints[:, [KP_LEFT_SHOULDER, KP_RIGHT_SHOULDER, KP_LEFT_HIP, KP_RIGHT_HIP], 2]
+    visible = visible.min(axis=1) >= min_conf
+    return np.where(visible, (shoulder_y - hip_y) / heights, np.nan)
+
+
+def mediapipe_joints(pose, landmarks, window) -> np.ndarray:
+    # Shoulders and hips in frame pixels, laid out like keypoint_joints.
+    lm = landmarks.landmark
+    names = pose.mp_pose.PoseLandmark
+    x1, y1, x2, y2 = window
+    points = [
+        lm[names.LEFT_SHOULDER],
+        lm[names.RIGHT_SHOULDER],
+        lm[names.LEFT_HIP],
+        lm[names.RIGHT_HIP],
+    ]
+    return np.array(
+        [[x1 + p.x * (x2 - x1), y1 + p.y * (y2 - y1), p.visibility] for p in points],
+        np.float32,
+    )
+
+
+def keypoint_joints(keypoints: np.ndarray) -> np.ndarray:
+    return keypoints[:, [KP_LEFT_SHOULDER, KP_RIGHT_SHOULDER, KP_LEFT_HIP, KP_RIGHT_HIP]]
+
+
+def stack_keypoints(detections) -> np.ndarray | None:
+    if any(len(d) > 0 and d.keypoints is None for d in detections):
+        return None
+    kps = [d.keypoints for d in detections if len(d) > 0]
+    if not kps:
+        return np.zeros((0, 17, 3), np.float32)
+    return np.concatenate(kps)
 
 
 class InferencePipeline:
-    def __init__(self, detector, pose, pose_y_diff: float) -> None:
+    def __init__(
+        self,
+        detector,
+        pose,
+        pose_y_diff: float,
+        pose_source: str = "mediapipe",
+        crop_size: int = 0,
+        crop_expand: float = 1.25,
+        crop_alpha: float = 0.5,
+    ) -> None:
         self.detector = detector
         self.pose = pose
         self.pose_y_diff = pose_y_diff
+        # "yolo" reads shoulders/hips from the detector's keypoints and skips MediaPipe.
+        self.pose_source = pose_source
+        # crop_size > 0 gives every pose estimator a stabilized, fixed-size crop.
+        self.crop_size = crop_size
+        self.crop_expand = crop_expand
+        self.crop_alpha = crop_alpha
+        self._stabilizers: dict[int, CropStabilizer] = {}
+        self.conf = 0.25
 
-    def run(self, frame):
-        results = self.detector.infer(frame)
-        ratio = 0
-        is_pose_fall = False
-        bbox = None
-        landmarks = None
-
-        if len(results.boxes) > 0:
-            best_box = max(
-                results.boxes,
-                key=lambda b: (b.xyxy[0][2] - b.xyxy[0][0])
-                * (b.xyxy[0][3] - b.xyxy[0][1]),
+    def apply_settings(self, values: dict) -> None:
+        self.conf = float(values.get("confThres", self.conf))
+        self.pose_y_diff = float(values.get("poseYDiff", self.pose_y_diff))
+
+    def stabilizer_for(self, pose) -> CropStabilizer | None:
+        if not self.crop_size:
+            return None
+        # One MediaPipe instance tracks one stream, so the crop state lives alongside it.
+        key = id(pose)
+        if key not in self._stabilizers:
+            self._stabilizers[key] = CropStabilizer(
+                self.crop_size, self.crop_expand, self.crop_alpha
             )
-            x1, y1, x2, y2 = map(int, best_box.xyxy[0])
-            bbox = (x1, y1, x2, y2)
-
-            w_box = x2 - x1
-            h_box = y2 - y1
-            ratio = w_box / max(h_box, 1)
-
-            crop = frame[y1:y2, x1:x2]
-            if crop.size > 0:
-                rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
-                pose_result = self.pose.process(rgb)
-                if pose_result.pose_landmarks:
-                    landmarks = pose_result.pose_landmarks
-
-                    lm = pose_result.pose_landmarks.landmark
-                    ls = lm[self.pose.mp_pose.PoseLandmark.LEFT_SHOULDER]
-                    rs = lm[self.pose.mp_pose.PoseLandmark.RIGHT_SHOULDER]
-                    lh = lm[self.pose.mp_pose.PoseLandmark.LEFT_HIP]
-                    rh = lm[self.pose.mp_pose.PoseLandmark.RIGHT_HIP]
-
-                    shoulder_y = (ls.y + rs.y) / 2
-                    hip_y = (lh.y + rh.y) / 2
-
-                    if shoulder_y > hip_y - self.pose_y_diff:
-                        is_pose_fall = True
-
-        return {
-            "ratio": ratio,
-            "is_pose_fall": is_pose_fall,
-            "bbox": bbox,
-            "landmarks": landmarks,
-        }
+        return self._stabilizers[key]
+
+    def reset_tracking(self, pose) -> None:
+        # Between unrelated clips both MediaPipe's tracking state and the crop
+        # window smoothed over the previous clip start over.
+        if pose is None:
+            return
+        pose.pose.reset()
+        stabilizer = self._stabilizers.get(id(pose))
+        if stabilizer is not None:
+            stabilizer.reset()
+
+    def run(self, frame):
+        return self.run_batch([frame])[0]
+
+    def run_batch(self, frames, poses=None):
+        with profiler.stage("detect"):
+            detections = self.detector.infer_batch(frames, conf=self.conf)
+        return self.analyze_batch(frames, detections, poses)
+
+    def analyze(self, frame, detections, pose=None):
+        return self.analyze_batch([frame], [detections], [pose or self.pose])[0]
+
+    def analyze_batch(self, frames, detections, poses=None):
+        poses = poses or [self.pose] * len(frames)
+        counts = np.array([len(d) for d in detections], dtype=np.int64)
+        if counts.sum() > 0:
+            boxes = np.concatenate([d.boxes for d in detections])
+        else:
+            boxes = np.zeros((0, 4), np.float32)
+        frame_idx = np.repeat(np.arange(len(frames)), counts)
+        areas, ratios = box_ratios(boxes)
+        best = largest_per_frame(frame_idx, areas, len(frames))
+        bboxes = boxes.astype(np.int64)
+        keypoints = None
+        pose_falls = None
+        pose_dy = None
+        if self.pose_source == "yolo":
+            with profiler.stage("keypoint_pose"):
+                keypoints = stack_keypoints(detections)
+                if keypoints is not None:
+                    pose_dy = keypoint_pose_dy(keypoints, boxes)
+                    with np.errstate(invalid="ignore"):
+                        pose_falls = pose_dy > -self.pose_y_diff
+
+        splits = np.cumsum(counts)[:-1]
+        det_pose_falls = pose_falls if pose_falls is not None else np.zeros(len(boxes), bool)
+        if keypoints is not None:
+            det_joints = keypoint_joints(keypoints).astype(np.float32)
+        else:
+            det_joints = np.full((len(boxes), 4, 3), np.nan, np.float32)
+        per_frame_ratios = np.split(ratios, splits)
+        per_frame_pose_falls = np.split(det_pose_falls.copy(), splits)
+        per_frame_joints = np.split(det_joints, splits)
+        offsets = np.r_[0, np.cumsum(counts)]
+
+        out = []
+        for i, frame in enumerate(frames):
+            result = {
+                "ratio": 0,
+                "is_pose_fall": False,
+                "bbox": None,
+                "landmarks": None,
+                # Region the landmarks are normalised to (the crop fed to MediaPipe).
+                "pose_box": None,
+                # Shoulder-minus-hip height in person-box heights (NaN if unknown);
+                # is_pose_fall is pose_dy > -pose_y_diff.
+                "pose_dy": float("nan"),
+                "detections": detections[i],
+                # Index of the largest box in detections[i], -1 if none.
+                "best": -1,
+                # Per-detection values, aligned with detections[i].boxes.
+                "ratios": per_frame_ratios[i],
+                "pose_falls": per_frame_pose_falls[i],
+                # Shoulders and hips (x, y, conf) in frame pixels; NaN where unknown.
+                "joints": per_frame_joints[i],
+            }
+            j = best[i]
+            if j < 0 and poses[i] is not None and pose_falls is None:
+                stabilizer = self.stabilizer_for(poses[i])
+                if stabilizer is not None:
+                    stabilizer.miss()
+            if j >= 0:
+                bbox = tuple(int(v) for v in bboxes[j])
+                result["best"] = int(j - offsets[i])
+                result["bbox"] = bbox
+                result["ratio"] = float(ratios[j])
+                if pose_falls is not None:
+                    result["is_pose_fall"] = bool(pose_falls[j])
+                    result["pose_dy"] = float(pose_dy[j])
+                    result["landmarks"] = keypoints[j]
+                    result["pose_box"] = bbox
+                elif poses[i] is not None:
+                    (
+                        result["is_pose_fall"],
+                        result["landmarks"],
+                        result["pose_box"],
+                        result["pose_dy"],
+                    ) = self._mediapipe_check(poses[i], frame, bbox)
+                    result["pose_falls"][result["best"]] = result["is_pose_fall"]
+                    if result["landmarks"] is not None:
+                        result["joints"][result["best"]] = mediapipe_joints(
+                            poses[i], result["landmarks"], result["pose_box"]
+                        )
+            out.append(result)
+        return out
+
+    def _mediapipe_check(self, pose, frame, bbox):
+        stabilizer = self.stabilizer_for(pose)
+        with profiler.stage("crop_color"):
+            if stabilizer is not None:
+                window = stabilizer.update(bbox, frame.shape)
+                crop = stabilizer.crop(frame, window)
+            else:
+                window = bbox
+                x1, y1, x2, y2 = bbox
+                crop = frame[y1:y2, x1:x2]
+            if crop.size == 0:
+                return False, None, window, float("nan")
+            rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        with profiler.stage("mediapipe"):
+            pose_result = pose.process(rgb)
+        if not pose_result.pose_landmarks:
+            return False, None, window, float("nan")
+
+        lm = pose_result.pose_landmarks.landmark
+        ls = lm[pose.mp_pose.PoseLandmark.LEFT_SHOULDER]
+        rs = lm[pose.mp_pose.PoseLandmark.RIGHT_SHOULDER]
+        lh = lm[pose.mp_pose.PoseLandmark.LEFT_HIP]
+        rh = lm[pose.mp_pose.PoseLandmark.RIGHT_HIP]
 
+        # Landmarks are normalised to the crop window; rescale to the person box
+        # height so pose_y_diff means the same thing with or without stabilization.
+        scale = (window[3] - window[1]) / max(bbox[3] - bbox[1], 1)
+        shoulder_y = (ls.y + rs.y) / 2
+        hip_y = (lh.y + rh.y) / 2
+        dy = (shoulder_y - hip_y) * scale
+        return dy > -self.pose_y_diff, pose_result.pose_landmarks, window, dy
@@ -1,12 +1,12 @@
-import mediapipe as mp
-
-
 class PoseEstimator:
     def __init__(
         self,
         min_detection_confidence: float = 0.5,
         min_tracking_confidence: float = 0.5,
     ) -> None:
+        # Imported here so processes that never build an estimator skip loading mediapipe.
+        import mediapipe as mp
+
         self.mp_pose = mp.solutions.pose
         self.mp_draw = mp.solutions.drawing_utils
         self.pose = self.mp_pose.Pose(
@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), np.float32)
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+class IouTracker:
+    def __init__(self, iou_thres: float = 0.3, max_missed: int = 15) -> None:
+        self.iou_thres = iou_thres
+        self.max_missed = max_missed
+        self.ids = np.zeros((0,), np.int64)
+        self.boxes = np.zeros((0, 4), np.float32)
+        self.missed = np.zeros((0,), np.int64)
+        self.next_id = 1
+
+    def reset(self) -> None:
+        self.__init__(self.iou_thres, self.max_missed)
+
+    def update(self, boxes: np.ndarray) -> np.ndarray:
+        boxes = np.asarray(boxes, np.float32).reshape(-1, 4)
+        det_ids = np.full(len(boxes), -1, np.int64)
+        matched = np.zeros(len(self.ids), bool)
+
+        iou = iou_matrix(self.boxes, boxes)
+        if iou.size:
+            # Greedy assignment, best overlaps first.
+            track_idx, det_idx = np.nonzero(iou >= self.iou_thres)
+            order = np.argsort(-iou[track_idx, det_idx], kind="stable")
+            for t, d in zip(track_idx[order], det_idx[order]):
+                if matched[t] or det_ids[d] >= 0:
+                    continue
+                matched[t] = True
+                det_ids[d] = self.ids[t]
+
+        rows = np.flatnonzero(det_ids >= 0)
+        if len(rows):
+            # Track ids are issued in increasing order, so self.ids stays sorted.
+            self.boxes[np.searchsorted(self.ids, det_ids[rows])] = boxes[rows]
+
+        self.missed = np.where(matched, 0, self.missed + 1)
+        new = np.flatnonzero(det_ids < 0)
+        if len(new):
+            new_ids = np.arange(self.next_id, self.next_id + len(new), dtype=np.int64)
+            self.next_id += len(new)
+            det_ids[new] = new_ids
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.boxes = np.concatenate([self.boxes, boxes[new]])
+            self.missed = np.concatenate([self.missed, np.zeros(len(new), np.int64)])
+
+        keep = self.missed <= self.max_missed
+        self.ids, self.boxes, self.missed = self.ids[keep], self.boxes[keep], self.missed[keep]
+        return det_ids
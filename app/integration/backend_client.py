@@ -1,16 +1,235 @@
+import glob
 import os
-import requests
+import threading
+import time
+
+from app.integration.outbox import EventOutbox, SpoolLock, remove_spool
+from app.profiling import profiler
 
 
 class BackendClient:
-    def __init__(self) -> None:
+    # ingest_event only spools the event; a background thread delivers it over
+    # a keep-alive session, with exponential backoff while the backend is down.
+    def __init__(self, spool_path: str | None = None) -> None:
         self.base_url = os.getenv("BACKEND_URL", "http://localhost:8000")
         self.ingest_key = os.getenv("INGEST_KEY", "ingest-secret")
+        self.timeout = float(os.getenv("INGEST_TIMEOUT_SEC", "3"))
+        self.batch_size = int(os.getenv("INGEST_BATCH_SIZE", "20"))
+        self.max_backoff = float(os.getenv("INGEST_MAX_BACKOFF_SEC", "60"))
+        spool_path = spool_path or os.getenv("OUTBOX_PATH", "outbox.db")
+        # Held for the client's lifetime. Another worker replaying this spool
+        # after a restart lets go within one batch; anything longer means a
+        # second process is using the same OUTBOX_PATH.
+        self._spool_lock = SpoolLock(spool_path)
+        if not self._spool_lock.acquire():
+            print(f"[backend] waiting for outbox lock {self._spool_lock.path}")
+            lock_timeout = float(os.getenv("OUTBOX_LOCK_TIMEOUT_SEC", "30"))
+            if not self._spool_lock.acquire(lock_timeout):
+                self._spool_lock.release()
+                raise RuntimeError(
+                    f"Outbox {spool_path} is in use by another process; "
+                    "give each process its own OUTBOX_PATH"
+                )
+        self.outbox = EventOutbox(spool_path)
+        self.outbox.release_holds()
+        # Spools of workers that are gone (the pool shrank) are replayed here too.
+        self.adopt_glob = os.getenv("OUTBOX_ADOPT", "")
+        self.adopt_interval = float(os.getenv("OUTBOX_ADOPT_SEC", "30"))
+        self.adopted = 0
+        self._next_adopt = 0.0
+        # requests is imported lazily to keep it off the worker's startup path.
+        import requests
+
+        self._requests = requests
+        self.session = requests.Session()
+        self.session.headers["X-INGEST-KEY"] = self.ingest_key
+        self.sent = 0
+        self.failed_attempts = 0
+        # Cleared when the backend predates /events/ingest/batch.
+        self._batch_supported = True
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="outbox-sender", daemon=True)
+        self._thread.start()
 
     def ingest_event(self, payload: dict) -> None:
+        with profiler.stage("outbox_put"):
+            self.outbox.put(payload)
+        self._wake.set()
+
+    def begin_event(self, payload: dict, parts: int) -> int:
+        # Spools the event now; it is sent once update_event has been called
+        # `parts` times, or after a restart if this process dies first.
+        with profiler.stage("outbox_put"):
+            return self.outbox.put(payload, holds=parts)
+
+    def update_event(self, row_id: int, fields: dict) -> None:
+        self.outbox.fill(row_id, fields)
+        self._wake.set()
+
+    def heartbeat(self, payload: dict) -> bool:
+        # Best effort and never spooled: a stale heartbeat is worthless.
+        url = f"{self.base_url}/runtime/heartbeat"
+        try:
+            resp = self.session.post(url, json=payload, timeout=self.timeout)
+        except self._requests.RequestException:
+            return False
+        return resp.status_code < 300
+
+    def fetch_settings(self, since: int) -> dict | None:
+        # {"version", "settings"}; settings is None when nothing changed since `since`.
+        url = f"{self.base_url}/runtime/settings"
+        try:
+            resp = self.session.get(url, params={"since": since}, timeout=self.timeout)
+        except self._requests.RequestException:
+            return None
+        if resp.status_code >= 300:
+            return None
+        return resp.json()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.outbox.pending(),
+            "sent": self.sent,
+            "failed_attempts": self.failed_attempts,
+            "adopted": self.adopted,
+        }
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self.session.close()
+        self.outbox.close()
+        self._spool_lock.release()
+
+    def _send(self, payload: dict) -> bool:
         url = f"{self.base_url}/events/ingest"
-        headers = {"X-INGEST-KEY": self.ingest_key}
         try:
-            requests.post(url, json=payload, headers=headers, timeout=3)
-        except requests.RequestException:
-            pass
+            with profiler.stage("backend_send"):
+                resp = self.session.post(url, json=payload, timeout=self.timeout)
+        except self._requests.RequestException:
+            return False
+        # 4xx other than auth/rate limits will never succeed; drop instead of retrying forever.
+        if 400 <= resp.status_code < 500 and resp.status_code not in (401, 408, 429):
+            print(f"[backend] event rejected status={resp.status_code} body={resp.text[:200]}")
+            return True
+        return resp.status_code < 300
+
+    def _send_batch(self, batch) -> tuple[list, list] | None:
+        # The whole due batch in one request. Rejected events are dropped like
+        # in _send; returns None when the backend has no batch endpoint.
+        url = f"{self.base_url}/events/ingest/batch"
+        try:
+            with profiler.stage("backend_send"):
+                resp = self.session.post(url, json=[p for _, p, _ in batch], timeout=self.timeout)
+        except self._requests.RequestException:
+            return [], [(row_id, attempts) for row_id, _, attempts in batch]
+        if resp.status_code in (404, 405):
+            print("[backend] batch ingest not available; sending events one by one")
+            self._batch_supported = False
+            return None
+        if resp.status_code >= 300:
+            if 400 <= resp.status_code < 500 and resp.status_code not in (401, 408, 413, 429):
+                print(f"[backend] batch rejected status={resp.status_code} body={resp.text[:200]}")
+                return [row_id for row_id, _, _ in batch], []
+            if resp.status_code == 413:
+                self.batch_size = max(1, self.batch_size // 2)
+            return [], [(row_id, attempts) for row_id, _, attempts in batch]
+        try:
+            results = resp.json().get("results", [])
+        except ValueError:
+            print(f"[backend] batch response is not JSON status={resp.status_code} body={resp.text[:200]}")
+            return [], [(row_id, attempts) for row_id, _, attempts in batch]
+        for result in results:
+            if result.get("status") != "ok":
+                print(f"[backend] event rejected detail={result.get('detail')}")
+        # Every event got an answer; rejected ones will never succeed either.
+        return [row_id for row_id, _, _ in batch], []
+
+    def _send_each(self, batch) -> tuple[list, list]:
+        sent, failed = [], []
+        for row_id, payload, attempts in batch:
+            if failed:
+                # Backend is unreachable; keep the rest of the batch for later.
+                failed.append((row_id, attempts))
+                continue
+            if self._send(payload):
+                sent.append(row_id)
+            else:
+                failed.append((row_id, attempts))
+        return sent, failed
+
+    def _deliver(self, outbox: EventOutbox, batch) -> float:
+        # Returns the backoff delay, or 0 when the whole batch went through.
+        result = self._send_batch(batch) if self._batch_supported else None
+        sent, failed = result if result is not None else self._send_each(batch)
+        outbox.ack(sent)
+        self.sent += len(sent)
+        if not failed:
+            return 0.0
+        self.failed_attempts += 1
+        attempts = min(a for _, a in failed)
+        delay = min(self.max_backoff, 2 ** attempts)
+        outbox.retry_later([i for i, _ in failed], delay)
+        return delay
+
+    def _adopt_orphans(self) -> bool:
+        # One batch per orphaned spool per call, so a worker that comes back
+        # gets its spool lock without waiting long. Empty spools are removed.
+        own = os.path.abspath(self.outbox.path)
+        sent_any = False
+        for path in glob.glob(self.adopt_glob):
+            if os.path.abspath(path) == own:
+                continue
+            lock = SpoolLock(path)
+            try:
+                if not lock.acquire():
+                    continue
+                outbox = EventOutbox(path)
+                outbox.release_holds()
+                try:
+                    batch = outbox.due(self.batch_size)
+                    if batch and not self._deliver(outbox, batch):
+                        self.adopted += len(batch)
+                        sent_any = True
+                    empty = outbox.pending() == 0
+                finally:
+                    outbox.close()
+                if empty:
+                    remove_spool(path)
+                    print(f"[backend] replayed orphaned spool {path}")
+            finally:
+                lock.release()
+        return sent_any
+
+    def _step(self) -> float:
+        # One sender iteration; returns how long to back off.
+        batch = self.outbox.due(self.batch_size)
+        if batch:
+            return self._deliver(self.outbox, batch)
+        now = time.monotonic()
+        if self.adopt_glob and now >= self._next_adopt:
+            self._next_adopt = now + self.adopt_interval
+            if self._adopt_orphans():
+                self._next_adopt = now
+            return 0.0
+        self._wake.wait(timeout=1.0)
+        self._wake.clear()
+        return 0.0
+
+    def _run(self) -> None:
+        # Anything left over from a previous run is replayed first.
+        errors = 0
+        while not self._stopped.is_set():
+            try:
+                delay = self._step()
+                errors = 0
+            except Exception as exc:
+                # A malformed response or a spool error must not end delivery
+                # for the rest of the process while detection keeps running.
+                errors += 1
+                delay = min(self.max_backoff, 2 ** errors)
+                print(f"[backend] outbox sender error: {exc!r}; retrying in {delay}s")
+            if delay:
+                self._stopped.wait(delay)
@@ -0,0 +1,45 @@
+import os
+import threading
+import time
+
+
+class HeartbeatSender:
+    # Reports per-camera FPS and capture-to-decision latency to the backend
+    # supervisor. Runs on its own thread so a slow backend never stalls frames.
+    def __init__(self, backend, worker_id: str, sessions, interval: float = 5.0) -> None:
+        self.backend = backend
+        self.worker_id = worker_id
+        self.sessions = sessions
+        self.interval = interval
+        self._last: dict[int, tuple[int, float]] = {}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="heartbeat", daemon=True)
+        self._thread.start()
+
+    def collect(self) -> dict:
+        now = time.monotonic()
+        cameras = []
+        for s in list(self.sessions):
+            frames, then = self._last.get(s.camera_id, (0, now))
+            # frames only advances on the frame loop, so a wedged loop shows up
+            # as no progress even though this thread keeps reporting.
+            fps = (s.frames - frames) / (now - then) if now > then else 0.0
+            self._last[s.camera_id] = (s.frames, now)
+            cameras.append(
+                {
+                    "camera_id": s.camera_id,
+                    "fps": round(fps, 2),
+                    "latency_ms": s.cap.stats.as_dict()["latency_ms_mean"] if s.online else 0.0,
+                    "frames": s.frames,
+                    "online": s.online,
+                }
+            )
+        return {"worker_id": self.worker_id, "pid": os.getpid(), "cameras": cameras}
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.backend.heartbeat(self.collect())
@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class EventOutbox:
+    # SQLite spool. Rows are deleted only after the backend has
+    # acknowledged them, so pending events survive crashes and restarts.
+    # A row can be written before the event is complete: it is held back until
+    # its `holds` outstanding parts (snapshot, clip) have been filled in.
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "payload TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_try REAL NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")]
+        if "holds" not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN holds INTEGER NOT NULL DEFAULT 0")
+
+    def release_holds(self) -> None:
+        # Parts still missing when the writing process died never arrive: send
+        # those events with what they have. Only call while holding the
+        # spool's SpoolLock, or a live writer's events are released early.
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET holds = 0 WHERE holds > 0")
+
+    def put(self, payload: dict, holds: int = 0) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO outbox (payload, holds, created_at) VALUES (?, ?, ?)",
+                (json.dumps(payload), holds, time.time()),
+            )
+            return cur.lastrowid
+
+    def fill(self, row_id: int, fields: dict) -> None:
+        # Merges fields into a held row's payload and releases one hold.
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM outbox WHERE id = ?", (row_id,)).fetchone()
+            if row is None:
+                return
+            payload = json.loads(row[0])
+            payload.update(fields)
+            self._conn.execute(
+                "UPDATE outbox SET payload = ?, holds = MAX(holds - 1, 0) WHERE id = ?",
+                (json.dumps(payload), row_id),
+            )
+
+    def due(self, limit: int) -> list[tuple[int, dict, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts FROM outbox WHERE holds = 0 AND next_try <= ? "
+                "ORDER BY id LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+        return [(row[0], json.loads(row[1]), row[2]) for row in rows]
+
+    def ack(self, ids: list[int]) -> None:
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+
+    def retry_later(self, ids: list[int], delay: float) -> None:
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_try = ? WHERE id = ?",
+                [(time.time() + delay, i) for i in ids],
+            )
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SpoolLock:
+    # An exclusive lock held next to a spool by the process that owns it, so
+    # other workers can tell a live spool from one its worker left behind.
+    def __init__(self, path: str) -> None:
+        self.path = f"{path}.lock"
+        self._file = open(self.path, "a+")
+        self.held = False
+
+    def _try_lock(self) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        self.held = True
+        return True
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        # Polls until the lock is taken or `timeout` seconds have passed.
+        deadline = time.monotonic() + timeout
+        while not self._try_lock():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.2)
+        return True
+
+    def release(self) -> None:
+        # The lock file itself stays: another process may be waiting on it.
+        if self.held and fcntl is None:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.held = False
+        self._file.close()
+
+
+def remove_spool(path: str) -> None:
+    for name in (path, f"{path}-wal", f"{path}-shm"):
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
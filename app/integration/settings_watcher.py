@@ -0,0 +1,41 @@
+import threading
+
+
+class SettingsWatcher:
+    # Polls the backend for the settings version and keeps the newest changed
+    # values until the frame loop takes them, so they are applied between
+    # frames rather than from this thread.
+    def __init__(self, backend, interval: float = 10.0) -> None:
+        self.backend = backend
+        self.interval = interval
+        self.version = -1
+        self._pending: dict | None = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="settings-watcher", daemon=True)
+        self._thread.start()
+
+    def take(self) -> dict | None:
+        with self._lock:
+            values, self._pending = self._pending, None
+        return values
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join(timeout=1.0)
+
+    def poll(self) -> None:
+        reply = self.backend.fetch_settings(self.version)
+        # No settings also covers version 0 (never saved): the backend
+        # defaults must not override this worker's env configuration.
+        if reply is None or reply.get("settings") is None:
+            return
+        with self._lock:
+            self._pending = reply["settings"]
+        self.version = reply["version"]
+        print(f"[settings] version {self.version} received")
+
+    def _run(self) -> None:
+        self.poll()
+        while not self._stopped.wait(self.interval):
+            self.poll()
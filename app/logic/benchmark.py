@@ -0,0 +1,118 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.logic.fall_logic import FallConfig
+from app.logic.temporal import make_fall_detector
+
+
+def synthetic_sequence(frames: int, fall_at: int, fps: float, rng, flicker: float = 0.1) -> dict:
+    # One person standing, then falling over ~0.5 s and lying still. Box,
+    # shoulder/hip joints and the per-frame pose flag get a little noise, and
+    # a share of standing frames get a spurious pose flag like a bad crop would.
+    t = np.arange(frames) / fps
+    progress = np.clip((np.arange(frames) - fall_at) / (0.5 * fps), 0, 1)
+    height = 300 - 220 * progress + rng.normal(0, 4, frames)
+    width = 100 + 200 * progress + rng.normal(0, 4, frames)
+    bottom = 420 + rng.normal(0, 2, frames)
+    x1 = 200 - width / 2
+    boxes = np.stack([x1, bottom - height, x1 + width, bottom], axis=1)
+
+    angle = np.radians(90 * progress)
+    hip = np.stack([np.full(frames, 200.0), bottom - 0.45 * height], axis=1)
+    torso = 0.35 * np.maximum(height, width)
+    shoulder = hip + np.stack([np.sin(angle) * torso, -np.cos(angle) * torso], axis=1)
+    joints = np.zeros((frames, 4, 3))
+    joints[:, 0:2, :2] = shoulder[:, None] + rng.normal(0, 3, (frames, 2, 2))
+    joints[:, 2:4, :2] = hip[:, None] + rng.normal(0, 3, (frames, 2, 2))
+    joints[:, :, 2] = 0.9
+
+    ratios = width / np.maximum(height, 1)
+    pose_falls = (progress > 0.7) | (rng.random(frames) < flicker)
+    return {
+        "t": t,
+        "boxes": boxes,
+        "joints": joints,
+        "ratios": ratios,
+        "pose_falls": pose_falls,
+        "fall_at": fall_at,
+    }
+
+
+def run_single(model: str, cfg: FallConfig, seq: dict) -> dict:
+    fall = make_fall_detector(model, cfg)
+    states = np.zeros(len(seq["t"]), bool)
+    t0 = time.perf_counter()
+    for i in range(len(seq["t"])):
+        states[i] = fall.update(
+            float(seq["ratios"][i]),
+            bool(seq["pose_falls"][i]),
+            seq["boxes"][i],
+            seq["joints"][i],
+            float(seq["t"][i]),
+        )
+    elapsed = time.perf_counter() - t0
+    onsets = np.flatnonzero(states & ~np.r_[False, states[:-1]])
+    after = onsets[onsets >= seq["fall_at"]]
+    return {
+        "us_per_frame": round(elapsed / len(states) * 1e6, 2),
+        "onsets": len(onsets),
+        "false_onsets": int((onsets < seq["fall_at"]).sum()),
+        "delay_frames": int(after[0] - seq["fall_at"]) if len(after) else None,
+    }
+
+
+def run_tracks(model: str, cfg: FallConfig, seqs: list[dict]) -> dict:
+    fall = make_fall_detector(model, cfg, tracking=True)
+    ids = np.arange(len(seqs))
+    frames = len(seqs[0]["t"])
+    ratios = np.stack([s["ratios"] for s in seqs], axis=1)
+    pose_falls = np.stack([s["pose_falls"] for s in seqs], axis=1)
+    boxes = np.stack([s["boxes"] for s in seqs], axis=1)
+    joints = np.stack([s["joints"] for s in seqs], axis=1)
+    t0 = time.perf_counter()
+    for i in range(frames):
+        fall.update(ids, ratios[i], pose_falls[i], boxes[i], joints[i], float(seqs[0]["t"][i]))
+    elapsed = time.perf_counter() - t0
+    return {"tracks": len(seqs), "us_per_frame": round(elapsed / frames * 1e6, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare per-frame cost and behaviour of the fall models on synthetic falls."
+    )
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--runs", type=int, default=20, help="Synthetic sequences per model")
+    parser.add_argument("--tracks", type=int, default=8, help="People for the tracking benchmark")
+    parser.add_argument("--flicker", type=float, default=0.1, help="Spurious pose-flag rate")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cfg = FallConfig(fall_window=8, aspect_ratio_thres=1.4, pose_y_diff=0.05)
+    rng = np.random.default_rng(args.seed)
+    fall_at = args.frames // 2
+    seqs = [
+        synthetic_sequence(args.frames, fall_at, args.fps, rng, args.flicker)
+        for _ in range(max(args.runs, args.tracks))
+    ]
+
+    report = {}
+    for model in ("counter", "temporal"):
+        runs = [run_single(model, cfg, s) for s in seqs[: args.runs]]
+        delays = [r["delay_frames"] for r in runs if r["delay_frames"] is not None]
+        report[model] = {
+            "us_per_frame": round(float(np.median([r["us_per_frame"] for r in runs])), 2),
+            "detected": f"{len(delays)}/{len(runs)}",
+            "delay_frames_median": float(np.median(delays)) if delays else None,
+            "false_onsets": sum(r["false_onsets"] for r in runs),
+            "onsets_per_run": round(float(np.mean([r["onsets"] for r in runs])), 2),
+            "tracking": run_tracks(model, cfg, seqs[: args.tracks]),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
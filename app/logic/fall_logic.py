@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+import numpy as np
+
 
 @dataclass
 class FallConfig:
@@ -18,7 +20,9 @@ class FallDetector:
         self.fall_counter = 0
         self.prev_fall = False
 
-    def update(self, ratio: float, is_pose_fall: bool) -> bool:
+    def update(self, ratio: float, is_pose_fall: bool, bbox=None, joints=None, t=None) -> bool:
+        # bbox/joints/t are only used by the temporal model; accepted here so the
+        # two are interchangeable.
         if ratio > self.cfg.aspect_ratio_thres or is_pose_fall:
             self.fall_counter += 1
         else:
@@ -27,3 +31,60 @@ class FallDetector:
         fall_detected = self.fall_counter >= self.cfg.fall_window
         return fall_detected
 
+
+class TrackFallDetector:
+    # Same counter rule as FallDetector, kept per track id in parallel arrays.
+    def __init__(self, cfg: FallConfig) -> None:
+        self.cfg = cfg
+        self.reset()
+
+    def reset(self) -> None:
+        self.ids = np.zeros((0,), np.int64)
+        self.counters = np.zeros((0,), np.int64)
+        self.falling = np.zeros((0,), bool)
+        self.onsets = np.zeros((0,), np.int64)
+
+    @property
+    def fall_counter(self) -> int:
+        return int(self.counters.max()) if len(self.counters) else 0
+
+    def update(
+        self,
+        track_ids: np.ndarray,
+        ratios: np.ndarray,
+        is_pose_fall: np.ndarray,
+        boxes=None,
+        joints=None,
+        t=None,
+    ) -> bool:
+        new = np.setdiff1d(track_ids, self.ids)
+        if len(new):
+            self.ids = np.concatenate([self.ids, new])
+            self.counters = np.concatenate([self.counters, np.zeros(len(new), np.int64)])
+            self.falling = np.concatenate([self.falling, np.zeros(len(new), bool)])
+            order = np.argsort(self.ids)
+            self.ids, self.counters, self.falling = (
+                self.ids[order],
+                self.counters[order],
+                self.falling[order],
+            )
+
+        hit = np.zeros(len(self.ids), bool)
+        rows = np.searchsorted(self.ids, track_ids)
+        hit[rows] = (np.asarray(ratios) > self.cfg.aspect_ratio_thres) | np.asarray(is_pose_fall, bool)
+        self.counters = np.where(hit, self.counters + 1, np.maximum(self.counters - 1, 0))
+
+        prev = self.falling
+        self.falling = self.counters >= self.cfg.fall_window
+        self.onsets = self.ids[self.falling & ~prev]
+        return bool(self.falling.any())
+
+    def prune(self, active_ids: np.ndarray) -> None:
+        keep = np.isin(self.ids, active_ids)
+        self.ids, self.counters, self.falling = self.ids[keep], self.counters[keep], self.falling[keep]
+
+    def falling_for(self, track_ids: np.ndarray) -> np.ndarray:
+        if len(self.ids) == 0:
+            return np.zeros(len(track_ids), bool)
+        rows = np.searchsorted(self.ids, track_ids).clip(max=len(self.ids) - 1)
+        return (self.ids[rows] == track_ids) & self.falling[rows]
@@ -0,0 +1,235 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.logic.fall_logic import FallConfig, FallDetector, TrackFallDetector
+
+
+# Ring columns, one row per frame.
+COL_T, COL_HIP_Y, COL_CENTER_Y, COL_HEIGHT, COL_ANGLE = range(5)
+N_COLS = 5
+
+# Per-track arrays, kept row-aligned and sorted by id.
+TRACK_STATE = (
+    "ids",
+    "ring",
+    "seen",
+    "ref_height",
+    "counters",
+    "upright",
+    "descent_at",
+    "falling",
+    "velocity",
+)
+
+
+@dataclass
+class TemporalConfig:
+    # Frames kept per person; velocity is measured over velocity_lag of them.
+    window: int = 16
+    velocity_lag: int = 4
+    # Downward hip speed, in upright body heights per second, that counts as a descent.
+    descent_velocity: float = 0.8
+    # Torso angle from vertical, in degrees, that counts as lying.
+    lying_angle: float = 60.0
+    # A height drop to this fraction of the upright height also counts as lying.
+    height_drop: float = 0.6
+    # Lying frames needed right after a descent; without one, 2 x fall_window.
+    confirm_frames: int = 3
+    descent_timeout_sec: float = 2.0
+    # Upright frames needed before a fall state is cleared.
+    recover_frames: int = 8
+    ref_height_alpha: float = 0.05
+    min_joint_conf: float = 0.3
+
+
+def joint_features(boxes: np.ndarray, joints: np.ndarray | None, min_conf: float):
+    # joints: (n, 4, 3) left/right shoulder, left/right hip as x, y, conf.
+    n = len(boxes)
+    center_y = (boxes[:, 1] + boxes[:, 3]) / 2
+    height = boxes[:, 3] - boxes[:, 1]
+    hip_y = np.full(n, np.nan)
+    angle = np.full(n, np.nan)
+    if joints is not None and n:
+        ok = np.nan_to_num(joints[:, :, 2]).min(axis=1) >= min_conf
+        shoulder = joints[:, 0:2, :2].mean(axis=1)
+        hip = joints[:, 2:4, :2].mean(axis=1)
+        dx = shoulder[:, 0] - hip[:, 0]
+        dy = hip[:, 1] - shoulder[:, 1]
+        hip_y = np.where(ok, hip[:, 1], np.nan)
+        angle = np.where(ok, np.degrees(np.arctan2(np.abs(dx), dy)), np.nan)
+    return hip_y, center_y, height, angle
+
+
+class TrackTemporalFallDetector:
+    # Keeps a fixed-size ring of per-frame features for every track in
+    # parallel arrays (tracks x window x columns). Each update writes one row
+    # per track and reads one lagged row, so the cost per frame does not
+    # depend on the window length.
+    def __init__(self, cfg: FallConfig, tcfg: TemporalConfig | None = None) -> None:
+        self.cfg = cfg
+        self.tcfg = tcfg or TemporalConfig()
+        self.reset()
+
+    def reset(self) -> None:
+        w = self.tcfg.window
+        self.ids = np.zeros((0,), np.int64)
+        self.ring = np.zeros((0, w, N_COLS))
+        self.seen = np.zeros((0,), np.int64)
+        self.ref_height = np.zeros((0,))
+        self.counters = np.zeros((0,), np.int64)
+        self.upright = np.zeros((0,), np.int64)
+        self.descent_at = np.zeros((0,))
+        self.falling = np.zeros((0,), bool)
+        self.onsets = np.zeros((0,), np.int64)
+        self.velocity = np.zeros((0,))
+
+    @property
+    def fall_counter(self) -> int:
+        return int(self.counters.max()) if len(self.counters) else 0
+
+    def _add(self, new: np.ndarray) -> None:
+        n = len(new)
+        grown = {
+            "ids": new,
+            "ring": np.zeros((n, self.tcfg.window, N_COLS)),
+            "seen": np.zeros(n, np.int64),
+            "ref_height": np.zeros(n),
+            "counters": np.zeros(n, np.int64),
+            "upright": np.zeros(n, np.int64),
+            "descent_at": np.full(n, -np.inf),
+            "falling": np.zeros(n, bool),
+            "velocity": np.zeros(n),
+        }
+        for name in TRACK_STATE:
+            setattr(self, name, np.concatenate([getattr(self, name), grown[name]]))
+        order = np.argsort(self.ids)
+        for name in TRACK_STATE:
+            setattr(self, name, getattr(self, name)[order])
+
+    def update(
+        self,
+        track_ids: np.ndarray,
+        ratios: np.ndarray,
+        is_pose_fall: np.ndarray,
+        boxes: np.ndarray | None = None,
+        joints: np.ndarray | None = None,
+        t: float | None = None,
+    ) -> bool:
+        tc = self.tcfg
+        track_ids = np.asarray(track_ids, np.int64)
+        new = np.setdiff1d(track_ids, self.ids)
+        if len(new):
+            self._add(new)
+        rows = np.searchsorted(self.ids, track_ids)
+        if boxes is None:
+            boxes = np.zeros((len(track_ids), 4))
+        boxes = np.asarray(boxes, np.float64)
+        t = float(t) if t is not None else 0.0
+
+        hip_y, center_y, height, angle = joint_features(boxes, joints, tc.min_joint_conf)
+        seen = self.seen[rows]
+        head = seen % tc.window
+        self.ring[rows, head] = np.stack([np.full(len(rows), t), hip_y, center_y, height, angle], axis=1)
+        self.seen[rows] = seen + 1
+
+        # Downward speed against the row velocity_lag frames back, in upright heights per second.
+        lag = np.minimum(seen, tc.velocity_lag)
+        past = self.ring[rows, (seen - lag) % tc.window]
+        dt = t - past[:, COL_T]
+        use_hip = ~np.isnan(hip_y) & ~np.isnan(past[:, COL_HIP_Y])
+        dy = np.where(use_hip, hip_y - past[:, COL_HIP_Y], center_y - past[:, COL_CENTER_Y])
+        ref = self.ref_height[rows]
+        ref = np.where(ref > 0, ref, np.maximum(height, 1))
+        velocity = np.where((lag > 0) & (dt > 0), dy / np.maximum(dt, 1e-6) / ref, 0.0)
+        self.velocity[rows] = velocity
+
+        lying = (
+            (np.asarray(ratios) > self.cfg.aspect_ratio_thres)
+            | np.asarray(is_pose_fall, bool)
+            | (np.nan_to_num(angle) > tc.lying_angle)
+            | ((height > 0) & (height < tc.height_drop * ref))
+        )
+        # The upright reference height only follows frames where the person is standing.
+        upright_h = ~lying & (height > 0)
+        self.ref_height[rows] = np.where(
+            upright_h, ref + tc.ref_height_alpha * (height - ref), self.ref_height[rows]
+        )
+
+        descent = self.descent_at[rows]
+        self.descent_at[rows] = np.where(velocity > tc.descent_velocity, t, descent)
+
+        hit = np.zeros(len(self.ids), bool)
+        hit[rows] = lying
+        self.counters = np.where(hit, self.counters + 1, np.maximum(self.counters - 1, 0))
+        # Frames without the track count as upright so a vanished person's state decays.
+        self.upright = np.where(hit, 0, self.upright + 1)
+
+        recent_descent = (t - self.descent_at) <= tc.descent_timeout_sec
+        trigger = (
+            (recent_descent & (self.counters >= tc.confirm_frames))
+            | (self.counters >= 2 * self.cfg.fall_window)
+        )
+        prev = self.falling
+        self.falling = trigger | (prev & (self.upright < tc.recover_frames))
+        self.onsets = self.ids[self.falling & ~prev]
+        return bool(self.falling.any())
+
+    def prune(self, active_ids: np.ndarray) -> None:
+        keep = np.isin(self.ids, active_ids)
+        for name in TRACK_STATE:
+            setattr(self, name, getattr(self, name)[keep])
+
+    def falling_for(self, track_ids: np.ndarray) -> np.ndarray:
+        if len(self.ids) == 0:
+            return np.zeros(len(track_ids), bool)
+        rows = np.searchsorted(self.ids, track_ids).clip(max=len(self.ids) - 1)
+        return (self.ids[rows] == track_ids) & self.falling[rows]
+
+
+class TemporalFallDetector:
+    # Single-person form with FallDetector's update(ratio, is_pose_fall) call.
+    def __init__(self, cfg: FallConfig, tcfg: TemporalConfig | None = None) -> None:
+        self.tracks = TrackTemporalFallDetector(cfg, tcfg)
+        self._id = np.zeros(1, np.int64)
+        self._frames = 0
+
+    @property
+    def cfg(self) -> FallConfig:
+        return self.tracks.cfg
+
+    @cfg.setter
+    def cfg(self, cfg: FallConfig) -> None:
+        self.tracks.cfg = cfg
+
+    def reset(self) -> None:
+        self.tracks.reset()
+        self._frames = 0
+
+    @property
+    def fall_counter(self) -> int:
+        return self.tracks.fall_counter
+
+    def update(
+        self,
+        ratio: float,
+        is_pose_fall: bool,
+        bbox=None,
+        joints: np.ndarray | None = None,
+        t: float | None = None,
+    ) -> bool:
+        self._frames += 1
+        if t is None:
+            # Without timestamps assume a steady 30 fps.
+            t = self._frames / 30.0
+        if bbox is None:
+            return self.tracks.update(self._id[:0], [], [], np.zeros((0, 4)), None, t)
+        boxes = np.asarray(bbox, np.float64).reshape(1, 4)
+        joints = None if joints is None else np.asarray(joints, np.float64).reshape(1, 4, 3)
+        return self.tracks.update(self._id, [ratio], [is_pose_fall], boxes, joints, t)
+
+
+def make_fall_detector(model: str, cfg: FallConfig, tracking: bool = False, tcfg=None):
+    if model == "temporal":
+        return TrackTemporalFallDetector(cfg, tcfg) if tracking else TemporalFallDetector(cfg, tcfg)
+    return TrackFallDetector(cfg) if tracking else FallDetector(cfg)
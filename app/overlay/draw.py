@@ -1,4 +1,13 @@
 import cv2
+import numpy as np
+
+
+COCO_SKELETON = (
+    (5, 6), (5, 7), (7, 9), (6, 8), (8, 10),
+    (5, 11), (6, 12), (11, 12),
+    (11, 13), (13, 15), (12, 14), (14, 16),
+    (0, 1), (0, 2), (1, 3), (2, 4),
+)
 
 
 def draw_bbox(frame, bbox, color=(0, 255, 0), thickness=2):
@@ -8,15 +17,55 @@ def draw_bbox(frame, bbox, color=(0, 255, 0), thickness=2):
     cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness)
 
 
+def draw_tracks(frame, boxes, track_ids, falling):
+    for box, tid, is_fall in zip(boxes.astype(int), track_ids, falling):
+        color = (0, 0, 255) if is_fall else (0, 255, 0)
+        x1, y1, x2, y2 = box
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(
+            frame,
+            f"#{tid}",
+            (x1, max(y1 - 6, 12)),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            color,
+            2,
+        )
+
+
+def draw_keypoints(frame, keypoints, min_conf: float = 0.3):
+    visible = keypoints[:, 2] >= min_conf
+    pts = keypoints[:, :2].astype(int)
+    for a, b in COCO_SKELETON:
+        if visible[a] and visible[b]:
+            cv2.line(frame, tuple(pts[a]), tuple(pts[b]), (255, 255, 255), 2)
+    for (x, y), ok in zip(pts, visible):
+        if ok:
+            cv2.circle(frame, (int(x), int(y)), 3, (0, 0, 255), -1)
+
+
 def draw_pose(pose, frame, bbox, landmarks):
-    if not (bbox and landmarks):
+    if not bbox or landmarks is None:
+        return
+    if isinstance(landmarks, np.ndarray):
+        # YOLO keypoints are already in frame coordinates.
+        draw_keypoints(frame, landmarks)
         return
     x1, y1, x2, y2 = bbox
-    pose.mp_draw.draw_landmarks(
-        frame[y1:y2, x1:x2],
-        landmarks,
-        pose.mp_pose.POSE_CONNECTIONS,
-    )
+    h, w = frame.shape[:2]
+    fx1, fy1, fx2, fy2 = max(x1, 0), max(y1, 0), min(x2, w), min(y2, h)
+    if fx1 >= fx2 or fy1 >= fy2:
+        return
+    if (fx1, fy1, fx2, fy2) == (x1, y1, x2, y2):
+        pose.mp_draw.draw_landmarks(frame[y1:y2, x1:x2], landmarks, pose.mp_pose.POSE_CONNECTIONS)
+        return
+    # A padded crop window reaches past the frame: draw on a canvas of the
+    # full window and copy the visible part back.
+    canvas = np.zeros((y2 - y1, x2 - x1, 3), frame.dtype)
+    inner = (slice(fy1 - y1, fy2 - y1), slice(fx1 - x1, fx2 - x1))
+    canvas[inner] = frame[fy1:fy2, fx1:fx2]
+    pose.mp_draw.draw_landmarks(canvas, landmarks, pose.mp_pose.POSE_CONNECTIONS)
+    frame[fy1:fy2, fx1:fx2] = canvas[inner]
 
 
 def draw_status(frame, status: str, counter: int, ratio: float, system_time: str):
@@ -0,0 +1,101 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+
+
+class PreviewPublisher:
+    # Serves the latest overlay frame per camera as a downscaled JPEG at
+    # GET /preview.jpg?cam=<id>. Frames are only rendered and encoded while
+    # someone has polled within idle_sec, and at most max_fps per camera.
+    def __init__(
+        self,
+        port: int,
+        host: str = "127.0.0.1",
+        max_fps: float = 2.0,
+        width: int = 480,
+        idle_sec: float = 10.0,
+    ) -> None:
+        self.min_interval = 1.0 / max(max_fps, 0.1)
+        self.width = width
+        self.idle_sec = idle_sec
+        self._lock = threading.Lock()
+        self._jpegs: dict[int, bytes] = {}
+        self._last_poll: dict[int, float] = {}
+        self._last_publish: dict[int, float] = {}
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = threading.Thread(target=self.server.serve_forever, name="preview", daemon=True)
+        self._thread.start()
+
+    def _handler(self):
+        publisher = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/preview.jpg":
+                    self.send_error(404)
+                    return
+                try:
+                    cam = int(parse_qs(url.query).get("cam", ["0"])[0])
+                except ValueError:
+                    self.send_error(400)
+                    return
+                data = publisher.poll(cam)
+                if data is None:
+                    self.send_response(204)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def poll(self, camera_id: int) -> bytes | None:
+        with self._lock:
+            self._last_poll[camera_id] = time.monotonic()
+            return self._jpegs.get(camera_id)
+
+    def wants_frame(self, camera_id: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            polled = self._last_poll.get(camera_id)
+            published = self._last_publish.get(camera_id, 0.0)
+        if polled is None or now - polled > self.idle_sec:
+            return False
+        return now - published >= self.min_interval
+
+    def publish(self, camera_id: int, frame) -> None:
+        h, w = frame.shape[:2]
+        if w > self.width:
+            frame = cv2.resize(frame, (self.width, int(h * self.width / w)), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
+        if not ok:
+            return
+        with self._lock:
+            self._jpegs[camera_id] = buf.tobytes()
+            self._last_publish[camera_id] = time.monotonic()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_preview(cfg):
+    if cfg.preview_port <= 0:
+        return None
+    return PreviewPublisher(
+        cfg.preview_port,
+        host=cfg.preview_host,
+        max_fps=cfg.preview_fps,
+        width=cfg.preview_width,
+    )
@@ -0,0 +1,135 @@
+import json
+import signal
+import threading
+import time
+
+import numpy as np
+
+
+# Log-spaced latency buckets from 10 us to 10 s.
+BUCKET_EDGES = np.geomspace(1e-5, 10.0, 61)
+
+
+class StageHistogram:
+    def __init__(self) -> None:
+        self.counts = np.zeros(len(BUCKET_EDGES) + 1, np.int64)
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.counts[np.searchsorted(BUCKET_EDGES, seconds)] += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        n = int(self.counts.sum())
+        if n == 0:
+            return 0.0
+        idx = int(np.searchsorted(np.cumsum(self.counts), q * n))
+        return float(BUCKET_EDGES[min(idx, len(BUCKET_EDGES) - 1)])
+
+    def summary(self) -> dict:
+        n = int(self.counts.sum())
+        return {
+            "count": n,
+            "mean_ms": round(self.total / max(n, 1) * 1000, 3),
+            "p50_ms": round(self.percentile(0.5) * 1000, 3),
+            "p90_ms": round(self.percentile(0.9) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    # Rolling per-stage latency histograms. When disabled, stage() hands back a
+    # shared no-op context manager, so instrumented code pays one attribute check.
+    def __init__(self) -> None:
+        self.enabled = False
+        self.export_sec = 0.0
+        self._lock = threading.Lock()
+        self._hists: dict[str, StageHistogram] = {}
+        self._window_start = time.monotonic()
+        # Set by SIGUSR1; the dump happens on the next maybe_export, since the
+        # handler may interrupt the main thread while it holds _lock.
+        self._dump_requested = False
+
+    def configure(self, enabled: bool, export_sec: float = 0.0) -> None:
+        self.enabled = enabled
+        self.export_sec = export_sec
+        self._window_start = time.monotonic()
+        if enabled and hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, lambda *_: self.request_dump())
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            hist = self._hists.get(name)
+            if hist is None:
+                hist = self._hists[name] = StageHistogram()
+            hist.add(seconds)
+
+    def snapshot(self, reset: bool = False) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            out = {
+                "window_sec": round(now - self._window_start, 1),
+                "stages": {name: h.summary() for name, h in sorted(self._hists.items())},
+            }
+            if reset:
+                self._hists = {}
+                self._window_start = now
+        return out
+
+    def dump(self) -> None:
+        print(f"[profile] {json.dumps(self.snapshot())}")
+
+    def request_dump(self) -> None:
+        self._dump_requested = True
+
+    def maybe_export(self) -> None:
+        if not self.enabled:
+            return
+        if self._dump_requested:
+            self._dump_requested = False
+            self.dump()
+        if self.export_sec <= 0:
+            return
+        if time.monotonic() - self._window_start >= self.export_sec:
+            print(f"[profile] {json.dumps(self.snapshot(reset=True))}")
+
+
+profiler = Profiler()
@@ -1,5 +1,9 @@
+import time
 from collections import deque
 
+import cv2
+import numpy as np
+
 
 class FrameBuffer:
     def __init__(self, maxlen: int):
@@ -8,6 +12,69 @@ class FrameBuffer:
     def append(self, frame):
         self.buffer.append(frame.copy())
 
-    def snapshot(self):
+    def resize(self, maxlen: int) -> None:
+        # Growing keeps everything already buffered; shrinking keeps the newest frames.
+        self.buffer = deque(self.buffer, maxlen=maxlen)
+
+    def snapshot(self, decode: bool = True):
         return list(self.buffer)
 
+    def stats(self) -> dict:
+        nbytes = sum(f.nbytes for f in self.buffer)
+        return {"mode": "raw", "frames": len(self.buffer), "mb": round(nbytes / 2**20, 1)}
+
+
+class EncodedFrameBuffer:
+    # Keeps pre-roll JPEG-encoded and only decodes when a clip needs it.
+    def __init__(self, maxlen: int, budget_bytes: int = 0, quality: int = 85):
+        self.maxlen = maxlen
+        self.budget_bytes = budget_bytes
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        self.buffer = deque()
+        self.nbytes = 0
+        self.encoded = 0
+        self.encode_sec = 0.0
+        self.evicted_for_budget = 0
+
+    def append(self, frame):
+        t0 = time.perf_counter()
+        ok, buf = cv2.imencode(".jpg", frame, self.params)
+        self.encode_sec += time.perf_counter() - t0
+        if not ok:
+            return
+        self.encoded += 1
+        data = buf.tobytes()
+        self.buffer.append(data)
+        self.nbytes += len(data)
+        while len(self.buffer) > self.maxlen:
+            self.nbytes -= len(self.buffer.popleft())
+        while self.budget_bytes and self.nbytes > self.budget_bytes and len(self.buffer) > 1:
+            self.nbytes -= len(self.buffer.popleft())
+            self.evicted_for_budget += 1
+
+    def resize(self, maxlen: int) -> None:
+        self.maxlen = maxlen
+        while len(self.buffer) > self.maxlen:
+            self.nbytes -= len(self.buffer.popleft())
+
+    def snapshot(self, decode: bool = True):
+        if not decode:
+            return list(self.buffer)
+        return [cv2.imdecode(np.frombuffer(b, np.uint8), cv2.IMREAD_COLOR) for b in self.buffer]
+
+    def stats(self) -> dict:
+        n = len(self.buffer)
+        return {
+            "mode": "jpeg",
+            "frames": n,
+            "mb": round(self.nbytes / 2**20, 1),
+            "kb_per_frame": round(self.nbytes / max(n, 1) / 1024, 1),
+            "encode_ms_mean": round(self.encode_sec / max(self.encoded, 1) * 1000, 2),
+            "evicted_for_budget": self.evicted_for_budget,
+        }
+
+
+def make_frame_buffer(mode: str, maxlen: int, budget_mb: float = 0, quality: int = 85):
+    if mode == "jpeg":
+        return EncodedFrameBuffer(maxlen, int(budget_mb * 2**20), quality)
+    return FrameBuffer(maxlen)
@@ -2,6 +2,13 @@ import os
 import cv2
 
 
+# Prefer H264-compatible codec for browser playback; fallback to mp4v.
+CODEC_CANDIDATES = ("avc1", "H264", "mp4v")
+# Codec that last opened successfully, per file extension, so clips after the
+# first one skip probing.
+_codec_cache: dict[str, str] = {}
+
+
 def ensure_dirs(*paths: str) -> None:
     for p in paths:
         os.makedirs(p, exist_ok=True)
@@ -11,18 +18,24 @@ def save_image(path: str, frame) -> None:
     cv2.imwrite(path, frame)
 
 
-def save_video(path: str, frames, fps: float, size: tuple[int, int]) -> None:
-    # Prefer H264-compatible codec for browser playback; fallback to mp4v.
-    codec_candidates = ["avc1", "H264", "mp4v"]
-    out = None
-    for codec in codec_candidates:
+def open_video_writer(path: str, fps: float, size: tuple[int, int]):
+    ext = os.path.splitext(path)[1].lower()
+    cached = _codec_cache.get(ext)
+    candidates = list(CODEC_CANDIDATES)
+    if cached:
+        candidates.remove(cached)
+        candidates.insert(0, cached)
+    for codec in candidates:
         writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, size)
         if writer.isOpened():
-            out = writer
-            break
+            _codec_cache[ext] = codec
+            return writer
         writer.release()
-    if out is None:
-        raise RuntimeError("Cannot initialize video writer")
+    raise RuntimeError("Cannot initialize video writer")
+
+
+def save_video(path: str, frames, fps: float, size: tuple[int, int]) -> None:
+    out = open_video_writer(path, fps, size)
     for f in frames:
         out.write(f)
     out.release()
@@ -1,20 +1,34 @@
-from app.recording.buffer import FrameBuffer
-from app.recording.clipper import save_video
+from app.recording.buffer import make_frame_buffer
+from app.recording.writer import ClipWriter
 
 
 class PrePostRecorder:
-    def __init__(self, save_before: int):
-        self.buffer = FrameBuffer(save_before)
-        self.record_frames = []
+    def __init__(
+        self,
+        save_before: int,
+        buffer_mode: str = "raw",
+        budget_mb: float = 0,
+        jpeg_quality: int = 85,
+        max_queue: int = 120,
+    ):
+        self.buffer = make_frame_buffer(buffer_mode, save_before, budget_mb, jpeg_quality)
+        self.max_queue = max_queue
+        self.writer: ClipWriter | None = None
 
     def push(self, frame) -> None:
         self.buffer.append(frame)
 
-    def start(self) -> None:
-        self.record_frames = self.buffer.snapshot()
+    def start(self, path: str, fps: float, size: tuple[int, int]) -> None:
+        # Encoded pre-roll is decoded on the writer thread, not here.
+        preroll = self.buffer.snapshot(decode=False)
+        self.writer = ClipWriter(path, fps, size, preroll=preroll, max_queue=self.max_queue)
 
     def append(self, frame) -> None:
-        self.record_frames.append(frame.copy())
+        if self.writer is not None:
+            self.writer.write(frame)
 
-    def save(self, path: str, fps: float, size: tuple[int, int]) -> None:
-        save_video(path, self.record_frames, fps, size)
+    def finish(self, on_done=None) -> None:
+        if self.writer is None:
+            return
+        self.writer.close(on_done)
+        self.writer = None
@@ -0,0 +1,138 @@
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+from app.profiling import profiler
+from app.recording.clipper import open_video_writer
+
+
+class ClipWriter:
+    # Encodes a clip on its own thread. The pre-roll is handed over in one
+    # piece; post-event frames go through a bounded queue and are dropped,
+    # never waited on, when the encoder falls behind.
+    def __init__(
+        self,
+        path: str,
+        fps: float,
+        size: tuple[int, int],
+        preroll=(),
+        max_queue: int = 120,
+    ) -> None:
+        self.path = path
+        self.fps = fps
+        self.size = size
+        self.preroll = list(preroll)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.written = 0
+        self.ok = False
+        self.on_done = None
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="clip-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, frame) -> bool:
+        try:
+            self.queue.put_nowait(frame.copy())
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, on_done=None) -> None:
+        self.on_done = on_done
+        self._closed.set()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _write(self, out, item) -> None:
+        with profiler.stage("clip_encode"):
+            if isinstance(item, bytes):
+                item = cv2.imdecode(np.frombuffer(item, np.uint8), cv2.IMREAD_COLOR)
+            out.write(item)
+        self.written += 1
+
+    def _run(self) -> None:
+        out = None
+        try:
+            out = open_video_writer(self.path, self.fps, self.size)
+            for item in self.preroll:
+                self._write(out, item)
+            self.preroll = []
+            while True:
+                try:
+                    item = self.queue.get(timeout=0.1)
+                except queue.Empty:
+                    if self._closed.is_set():
+                        break
+                    continue
+                self._write(out, item)
+            self.ok = True
+        except Exception as exc:
+            print(f"[recorder] clip {self.path} failed: {exc}")
+        finally:
+            if out is not None:
+                out.release()
+        self._closed.wait()
+        if self.dropped:
+            print(f"[recorder] clip {self.path} dropped {self.dropped} frames")
+        if self.on_done is not None:
+            self.on_done(self)
+
+
+class ImageWriter:
+    # Snapshot JPEG encoding and disk writes, off the detection thread.
+    def __init__(self, max_queue: int = 32) -> None:
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="image-writer", daemon=True)
+        self._thread.start()
+
+    def save(self, path: str, frame, on_done=None) -> bool:
+        # Never blocks: with dozens of snapshots already pending this one is
+        # dropped and False returned. on_done(ok) runs once the file is written.
+        try:
+            self.queue.put_nowait((path, frame.copy(), on_done))
+        except queue.Full:
+            print(f"[recorder] snapshot {path} dropped: writer queue full")
+            return False
+        return True
+
+    def flush(self) -> None:
+        self.queue.join()
+
+    def _run(self) -> None:
+        while True:
+            path, frame, on_done = self.queue.get()
+            try:
+                try:
+                    with profiler.stage("snapshot_write"):
+                        ok = cv2.imwrite(path, frame)
+                except cv2.error:
+                    ok = False
+                if not ok:
+                    print(f"[recorder] snapshot {path} failed")
+                if on_done is not None:
+                    on_done(ok)
+            finally:
+                self.queue.task_done()
+
+
+_image_writer: ImageWriter | None = None
+
+
+def save_image_async(path: str, frame, on_done=None) -> bool:
+    global _image_writer
+    if _image_writer is None:
+        _image_writer = ImageWriter()
+    return _image_writer.save(path, frame, on_done)
+
+
+def flush_images() -> None:
+    if _image_writer is not None:
+        _image_writer.flush()
@@ -0,0 +1,257 @@
+import os
+from datetime import datetime, timezone
+
+from app.config import Settings
+from app.events.handler import FallEventHandler
+from app.inference.tracker import IouTracker
+from app.logic.fall_logic import FallConfig
+from app.logic.temporal import make_fall_detector
+from app.profiling import profiler
+from app.overlay.draw import draw_bbox, draw_pose, draw_status, draw_tracks
+from app.recording.recorder import PrePostRecorder
+from app.runtime.scheduler import InferenceScheduler
+from app.video.motion import MotionGate
+from app.recording.writer import flush_images, save_image_async
+
+
+class CameraSession:
+    def __init__(
+        self,
+        cfg: Settings,
+        camera_id: int,
+        cap,
+        backend,
+        pose=None,
+        file_prefix: str = "fall",
+        preview=None,
+        motion_roi=None,
+        motion_masks=None,
+    ) -> None:
+        self.cfg = cfg
+        self.camera_id = camera_id
+        self.cap = cap
+        self.backend = backend
+        self.pose = pose
+        self.file_prefix = file_prefix
+        self.preview = preview
+        self.fps = cap.fps()
+        self.size = cap.size()
+        fall_cfg = FallConfig(
+            fall_window=cfg.fall_window,
+            aspect_ratio_thres=cfg.aspect_ratio_thres,
+            pose_y_diff=cfg.pose_y_diff,
+        )
+        self.tracker = None
+        if cfg.tracking:
+            self.tracker = IouTracker(cfg.track_iou_thres, cfg.track_max_missed)
+        self.fall = make_fall_detector(cfg.fall_model, fall_cfg, tracking=cfg.tracking)
+        self.recorder = PrePostRecorder(
+            cfg.save_before,
+            buffer_mode=cfg.buffer_mode,
+            budget_mb=cfg.buffer_budget_mb,
+            jpeg_quality=cfg.buffer_jpeg_quality,
+            max_queue=cfg.clip_queue_size,
+        )
+        self.events = FallEventHandler(cfg.save_after, cfg.cooldown_sec, cfg.merge_sec)
+        self.motion_gate = None
+        if cfg.motion_gate:
+            self.motion_gate = MotionGate(
+                threshold=cfg.motion_threshold,
+                min_area=cfg.motion_min_area,
+                roi=motion_roi or cfg.motion_roi,
+                masks=motion_masks or cfg.motion_masks,
+            )
+        self.scheduler = None
+        if cfg.detect_idle_interval > 1 or self.motion_gate is not None:
+            self.scheduler = InferenceScheduler(cfg.detect_idle_interval, cfg.detect_hold_frames)
+        self.fall_detected = False
+        self.frames = 0
+        # False while a dropped live capture is being reopened.
+        self.online = True
+        self.img_path = ""
+        self.vid_path = ""
+        # Outbox row of the event being recorded.
+        self.event_row = None
+        # Every clip still encoding or waiting to ingest, joined on close.
+        self.writers = []
+        # Last detection result, for the event payload if close() cuts a clip short.
+        self._last_result = None
+
+    def wants_detection(self, frame) -> bool:
+        motion = self.motion_gate.update(frame) if self.motion_gate is not None else None
+        if self.scheduler is None:
+            return True
+        return self.scheduler.should_detect(self.fall.fall_counter, motion)
+
+    def process(self, packet, result: dict | None, infer_sec: float = 0.0) -> bool:
+        # result is None when the scheduler skipped inference for this frame;
+        # fall state is then held and the last boxes are propagated.
+        cfg = self.cfg
+        frame = packet.frame
+        self.frames += 1
+        with profiler.stage("buffer_push"):
+            self.recorder.push(frame)
+
+        onsets = None
+        if result is None:
+            result = self.scheduler.propagate()
+            fall_detected = self.fall_detected
+            if self.tracker is not None:
+                boxes, track_ids = self.tracker.boxes, self.tracker.ids
+                onsets = self.fall.onsets[:0]
+        else:
+            if self.scheduler is not None:
+                self.scheduler.record(result, infer_sec)
+            with profiler.stage("fall_logic"):
+                if self.tracker is not None:
+                    boxes = result["detections"].boxes
+                    track_ids = self.tracker.update(boxes)
+                    fall_detected = self.fall.update(
+                        track_ids,
+                        result["ratios"],
+                        result["pose_falls"],
+                        boxes,
+                        result["joints"],
+                        packet.captured_at,
+                    )
+                    self.fall.prune(self.tracker.ids)
+                    onsets = self.fall.onsets
+                else:
+                    best = result["best"]
+                    fall_detected = self.fall.update(
+                        result["ratio"],
+                        result["is_pose_fall"],
+                        result["bbox"],
+                        result["joints"][best] if best >= 0 else None,
+                        packet.captured_at,
+                    )
+            self.cap.mark_decision(packet)
+        self.fall_detected = fall_detected
+
+        events = self.events
+        preview_due = self.preview is not None and self.preview.wants_frame(self.camera_id)
+        # Snapshots and clips keep their overlays; otherwise headless frames nobody
+        # is watching are left undrawn.
+        overlay_due = not cfg.headless or preview_due or fall_detected or events.state.recording
+        if overlay_due:
+            with profiler.stage("overlay"):
+                if self.tracker is not None:
+                    draw_tracks(frame, boxes, track_ids, self.fall.falling_for(track_ids))
+                else:
+                    draw_bbox(frame, result["bbox"])
+                draw_pose(self.pose, frame, result["pose_box"], result["landmarks"])
+
+                status = "FALL" if fall_detected else "NORMAL"
+                system_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                draw_status(frame, status, self.fall.fall_counter, result["ratio"], system_time)
+
+        if onsets is None:
+            start = events.should_start_event(fall_detected)
+        else:
+            start = events.should_start_track_event(onsets)
+        if start:
+            if events.state.recording:
+                # A new track fell past the merge window: close the current clip first.
+                events.end_event()
+                self._finish_event(result)
+            ts = events.start_event(onsets if onsets is not None else ())
+            self.img_path = os.path.join(cfg.img_dir, f"{self.file_prefix}_{ts}.jpg")
+            self.vid_path = os.path.join(cfg.vid_dir, f"{self.file_prefix}_{ts}.mp4")
+            self._begin_event(frame, result)
+            with profiler.stage("clip_start"):
+                self.recorder.start(self.vid_path, self.fps, self.size)
+            self.writers = [w for w in self.writers if w.is_alive()]
+            self.writers.append(self.recorder.writer)
+
+        if events.state.recording:
+            with profiler.stage("clip_queue"):
+                self.recorder.append(frame)
+            if events.update_recording():
+                self._finish_event(result)
+
+        if preview_due:
+            with profiler.stage("preview"):
+                self.preview.publish(self.camera_id, frame)
+
+        events.set_prev(fall_detected)
+        self._last_result = result
+        return fall_detected
+
+    def apply_settings(self, values: dict) -> None:
+        # Called between frames; backend settings are in seconds, buffers in frames.
+        old = self.fall.cfg
+        self.fall.cfg = FallConfig(
+            fall_window=int(values.get("fallWindow", old.fall_window)),
+            aspect_ratio_thres=float(values.get("aspectRatioThres", old.aspect_ratio_thres)),
+            pose_y_diff=float(values.get("poseYDiff", old.pose_y_diff)),
+        )
+        if "preBufferSec" in values:
+            self.recorder.buffer.resize(max(1, round(values["preBufferSec"] * self.fps)))
+        if "postBufferSec" in values:
+            self.events.save_after = max(1, round(values["postBufferSec"] * self.fps))
+        if "cooldownSec" in values:
+            self.events.cooldown_sec = float(values["cooldownSec"])
+
+    def close(self) -> None:
+        # Let every clip finish writing, and its ingest callback run, before
+        # the backend client is closed. A clip still recording is cut short
+        # but its event is still ingested.
+        if self.events.state.recording and self._last_result is not None:
+            self.events.end_event()
+            self._finish_event(self._last_result)
+        self.recorder.finish()
+        for writer in self.writers:
+            writer.join(timeout=10)
+        self.writers = []
+        flush_images()
+        self.cap.release()
+
+    def _confidence(self) -> float:
+        return min(1.0, self.fall.fall_counter / max(self.fall.cfg.fall_window, 1))
+
+    def _begin_event(self, frame, result: dict) -> None:
+        # The event is spooled as soon as it starts and held back until its
+        # snapshot and clip are written. If the worker dies first, it is sent
+        # after the restart without them.
+        payload = {
+            "camera_id": self.camera_id,
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "confidence": self._confidence(),
+            "snapshot_path": None,
+            "clip_path": None,
+            "meta": {
+                "ratio": result["ratio"],
+                "counter": self.fall.fall_counter,
+                "tracks": list(self.events.state.track_ids),
+            },
+        }
+        row_id = self.event_row = self.backend.begin_event(payload, parts=2)
+        img_path = self.img_path
+
+        def on_snapshot(ok: bool) -> None:
+            self.backend.update_event(row_id, {"snapshot_path": img_path if ok else None})
+
+        if not save_image_async(img_path, frame, on_snapshot):
+            on_snapshot(False)
+
+    def _finish_event(self, result: dict) -> None:
+        events = self.events
+        row_id = self.event_row
+        fields = {
+            "confidence": self._confidence(),
+            "clip_path": self.vid_path,
+            "meta": {
+                "ratio": result["ratio"],
+                "counter": self.fall.fall_counter,
+                "tracks": list(events.state.track_ids),
+                **events.take_counts(),
+            },
+        }
+        # The event is released once the clip is fully written so the backend can serve it.
+        self.recorder.finish(lambda writer: self._complete(row_id, fields, writer))
+
+    def _complete(self, row_id: int, fields: dict, writer) -> None:
+        if not writer.ok:
+            fields["clip_path"] = None
+        fields["meta"]["clip_dropped_frames"] = writer.dropped
+        self.backend.update_event(row_id, fields)
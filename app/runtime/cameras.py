@@ -0,0 +1,63 @@
+import json
+import os
+import sqlite3
+from dataclasses import dataclass, field
+
+from app.config import Settings
+
+
+@dataclass
+class CameraSpec:
+    id: int
+    name: str
+    source: object
+    motion_roi: list = field(default_factory=list)
+    motion_masks: list = field(default_factory=list)
+
+
+def parse_source(value):
+    value = str(value).strip()
+    return int(value) if value.isdigit() else value
+
+
+def load_cameras_file(path: str) -> list[CameraSpec]:
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    cams = []
+    for item in raw:
+        if not item.get("enabled", True):
+            continue
+        cams.append(
+            CameraSpec(
+                id=int(item["id"]),
+                name=item.get("name") or f"camera-{item['id']}",
+                source=parse_source(item.get("source", item.get("rtsp_url", ""))),
+                motion_roi=item.get("motion_roi", []),
+                motion_masks=item.get("motion_masks", []),
+            )
+        )
+    return cams
+
+
+def load_cameras_db(path: str) -> list[CameraSpec]:
+    if not os.path.exists(path):
+        return []
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT id, name, rtsp_url FROM cameras WHERE enabled = 1 ORDER BY id ASC"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [CameraSpec(id=row[0], name=row[1], source=parse_source(row[2])) for row in rows]
+
+
+def load_cameras(cfg: Settings) -> list[CameraSpec]:
+    if cfg.cameras_file:
+        cams = load_cameras_file(cfg.cameras_file)
+    else:
+        cams = load_cameras_db(cfg.cameras_db)
+    if cfg.camera_ids.strip():
+        wanted = {int(c) for c in cfg.camera_ids.split(",") if c.strip()}
+        cams = [c for c in cams if c.id in wanted]
+    return cams
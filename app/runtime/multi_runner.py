@@ -0,0 +1,190 @@
+import time
+import cv2
+
+from app.config import Settings
+from app.integration.backend_client import BackendClient
+from app.integration.heartbeat import HeartbeatSender
+from app.integration.settings_watcher import SettingsWatcher
+from app.inference.pipeline import InferencePipeline
+from app.inference.pose import PoseEstimator
+from app.overlay.preview import make_preview
+from app.profiling import profiler
+from app.recording.clipper import ensure_dirs
+from app.runtime.camera_session import CameraSession
+from app.runtime.cameras import load_cameras
+from app.runtime.shutdown import stop_requested
+from app.runtime.startup import BackgroundLoad, StartupTimeline, build_models, warm_up
+from app.video.capture import CaptureReopener, LatestFrameReader, is_live_source, open_capture
+
+
+def run_multi(timeline: StartupTimeline | None = None):
+    timeline = timeline or StartupTimeline()
+    cfg = Settings()
+    ensure_dirs(cfg.img_dir, cfg.vid_dir)
+    profiler.configure(cfg.profile, cfg.profile_export_sec)
+
+    cameras = load_cameras(cfg)
+    if not cameras:
+        raise RuntimeError("No enabled cameras configured")
+
+    # Model loading overlaps with opening the cameras.
+    models = BackgroundLoad(build_models, cfg, timeline)
+    with timeline.phase("services"):
+        backend = BackendClient()
+        preview = make_preview(cfg)
+
+    caps = []
+    with timeline.phase("camera_open"):
+        for cam in cameras:
+            try:
+                caps.append((cam, open_capture(cam.source, cfg.capture_mode, cfg.capture_shm_slots)))
+            except RuntimeError as exc:
+                print(f"[multi] skip camera {cam.id}: {exc}")
+
+    detector, first_pose = models.result()
+    pipeline = InferencePipeline(
+        detector,
+        None,
+        cfg.pose_y_diff,
+        cfg.pose_source,
+        crop_size=cfg.pose_crop_size,
+        crop_expand=cfg.pose_crop_expand,
+        crop_alpha=cfg.pose_crop_alpha,
+    )
+
+    sessions = []
+    sources = {cam.id: cam.source for cam, _ in caps}
+    # Live cameras that dropped out, by camera id, while their capture is reopened.
+    reopening: dict[int, CaptureReopener] = {}
+    for i, (cam, cap) in enumerate(caps):
+        # MediaPipe tracks between frames, so every stream needs its own estimator.
+        pose = first_pose
+        if i > 0 and first_pose is not None:
+            with timeline.phase("pose_load"):
+                pose = PoseEstimator()
+        sessions.append(
+            CameraSession(
+                cfg,
+                cam.id,
+                cap,
+                backend,
+                pose=pose,
+                file_prefix=f"fall_cam{cam.id}",
+                preview=preview,
+                motion_roi=cam.motion_roi,
+                motion_masks=cam.motion_masks,
+            )
+        )
+    if sessions:
+        warm_up(detector, [s.pose for s in sessions], sessions[0].size, timeline)
+    timeline.emit()
+    print(f"[multi] ready cameras={[s.camera_id for s in sessions]}")
+    heartbeat = None
+    if cfg.worker_id:
+        heartbeat = HeartbeatSender(backend, cfg.worker_id, sessions, cfg.heartbeat_sec)
+    watcher = None
+    if cfg.settings_poll_sec > 0:
+        watcher = SettingsWatcher(backend, cfg.settings_poll_sec)
+    last_stats = time.monotonic()
+
+    while sessions and not stop_requested.is_set():
+        if watcher is not None:
+            values = watcher.take()
+            if values is not None:
+                pipeline.apply_settings(values)
+                for s in sessions:
+                    s.apply_settings(values)
+
+        for camera_id, reopener in list(reopening.items()):
+            cap = reopener.take()
+            if cap is not None:
+                s = next(s for s in sessions if s.camera_id == camera_id)
+                s.cap.release()
+                s.cap = cap
+                s.online = True
+                del reopening[camera_id]
+                print(f"[multi] camera {camera_id} reconnected after {reopener.attempts} attempts")
+
+        live = [s for s in sessions if s.camera_id not in reopening]
+        for s in live:
+            if isinstance(s.cap, LatestFrameReader):
+                s.cap.request()
+
+        batch = []
+        for s in live:
+            packet = s.cap.read_packet()
+            if packet is None:
+                source = sources[s.camera_id]
+                if is_live_source(source):
+                    print(f"[multi] camera {s.camera_id} lost; reconnecting")
+                    reopening[s.camera_id] = CaptureReopener(source, cfg.capture_mode, cfg.capture_shm_slots)
+                    s.online = False
+                else:
+                    print(f"[multi] camera {s.camera_id} stopped")
+                    s.close()
+                    sessions.remove(s)
+                continue
+            batch.append((s, packet))
+        if not batch:
+            if not reopening:
+                break
+            time.sleep(0.1)
+            continue
+
+        batch_t0 = time.perf_counter()
+        detect = [(s, packet) for s, packet in batch if s.wants_detection(packet.frame)]
+        results = {}
+        infer_sec = 0.0
+        if detect:
+            t0 = time.perf_counter()
+            out = pipeline.run_batch(
+                [packet.frame for _, packet in detect],
+                poses=[s.pose for s, _ in detect],
+            )
+            infer_sec = (time.perf_counter() - t0) / len(detect)
+            results = {s.camera_id: r for (s, _), r in zip(detect, out)}
+        for s, packet in batch:
+            s.process(packet, results.get(s.camera_id), infer_sec)
+            if not cfg.headless:
+                cv2.imshow(f"Camera {s.camera_id}", packet.frame)
+        # "batch" is the whole iteration; "frame" its per-camera share, as in
+        # the single-camera loop.
+        batch_sec = time.perf_counter() - batch_t0
+        profiler.record("batch", batch_sec)
+        profiler.record("frame", batch_sec / len(batch))
+        profiler.maybe_export()
+
+        now = time.monotonic()
+        if cfg.stats_interval_sec > 0 and now - last_stats >= cfg.stats_interval_sec:
+            for s in sessions:
+                if s.camera_id in reopening:
+                    print(f"[capture] camera={s.camera_id} reconnecting attempts={reopening[s.camera_id].attempts}")
+                    continue
+                print(f"[capture] camera={s.camera_id} {s.cap.stats.as_dict()}")
+                if hasattr(s.cap, "ring_stats"):
+                    print(f"[shm] camera={s.camera_id} {s.cap.ring_stats()}")
+                print(f"[buffer] camera={s.camera_id} {s.recorder.buffer.stats()}")
+                if s.scheduler is not None:
+                    print(f"[scheduler] camera={s.camera_id} {s.scheduler.stats()}")
+                if s.motion_gate is not None:
+                    print(f"[motion] camera={s.camera_id} {s.motion_gate.stats()}")
+            last_stats = now
+
+        if not cfg.headless and cv2.waitKey(1) == 27:
+            break
+
+    # Frames may be views into a shared-memory ring; drop them before the captures close.
+    packet = batch = detect = None
+    if heartbeat is not None:
+        heartbeat.stop()
+    if watcher is not None:
+        watcher.stop()
+    for reopener in reopening.values():
+        reopener.stop()
+    for s in sessions:
+        s.close()
+    backend.close()
+    if preview is not None:
+        preview.close()
+    if not cfg.headless:
+        cv2.destroyAllWindows()
@@ -1,87 +1,101 @@
-import os
+import time
 import cv2
-from datetime import datetime, timezone
 
 from app.config import Settings
-from app.events.handler import FallEventHandler
 from app.integration.backend_client import BackendClient
-from app.inference.detector import YoloPoseDetector
-from app.inference.pose import PoseEstimator
+from app.integration.heartbeat import HeartbeatSender
+from app.integration.settings_watcher import SettingsWatcher
 from app.inference.pipeline import InferencePipeline
-from app.logic.fall_logic import FallConfig, FallDetector
-from app.overlay.draw import draw_bbox, draw_pose, draw_status
-from app.recording.clipper import ensure_dirs, save_image
-from app.recording.recorder import PrePostRecorder
-from app.video.capture import VideoCapture
+from app.overlay.preview import make_preview
+from app.profiling import profiler
+from app.recording.clipper import ensure_dirs
+from app.runtime.camera_session import CameraSession
+from app.runtime.shutdown import stop_requested
+from app.runtime.startup import BackgroundLoad, StartupTimeline, build_models, warm_up
+from app.video.capture import open_capture
 
 
-def run_realtime():
+def run_realtime(timeline: StartupTimeline | None = None):
+    timeline = timeline or StartupTimeline()
     cfg = Settings()
     ensure_dirs(cfg.img_dir, cfg.vid_dir)
+    profiler.configure(cfg.profile, cfg.profile_export_sec)
 
-    detector = YoloPoseDetector(cfg.model_path)
-    pose = PoseEstimator()
-    pipeline = InferencePipeline(detector, pose, cfg.pose_y_diff)
-    fall = FallDetector(
-        FallConfig(
-            fall_window=cfg.fall_window,
-            aspect_ratio_thres=cfg.aspect_ratio_thres,
-            pose_y_diff=cfg.pose_y_diff,
-        )
+    # Model loading overlaps with opening the camera.
+    models = BackgroundLoad(build_models, cfg, timeline)
+    with timeline.phase("camera_open"):
+        cap = open_capture(cfg.capture_source(), cfg.capture_mode, cfg.capture_shm_slots)
+    with timeline.phase("services"):
+        backend = BackendClient()
+        preview = make_preview(cfg)
+
+    detector, pose = models.result()
+    pipeline = InferencePipeline(
+        detector,
+        pose,
+        cfg.pose_y_diff,
+        cfg.pose_source,
+        crop_size=cfg.pose_crop_size,
+        crop_expand=cfg.pose_crop_expand,
+        crop_alpha=cfg.pose_crop_alpha,
     )
-    recorder = PrePostRecorder(cfg.save_before)
-    events = FallEventHandler(cfg.save_after)
-    backend = BackendClient()
+    warm_up(detector, [pose], cap.size(), timeline)
+    session = CameraSession(cfg, cfg.cam_id, cap, backend, pose=pose, preview=preview)
+    timeline.emit()
+    print("[realtime] ready")
+    heartbeat = None
+    if cfg.worker_id:
+        heartbeat = HeartbeatSender(backend, cfg.worker_id, [session], cfg.heartbeat_sec)
+    watcher = None
+    if cfg.settings_poll_sec > 0:
+        watcher = SettingsWatcher(backend, cfg.settings_poll_sec)
+    last_stats = time.monotonic()
 
-    cap = VideoCapture(cfg.cam_id)
-    fps = cap.fps()
-    w, h = cap.size()
+    while not stop_requested.is_set():
+        if watcher is not None:
+            values = watcher.take()
+            if values is not None:
+                pipeline.apply_settings(values)
+                session.apply_settings(values)
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
+        packet = cap.read_packet()
+        if packet is None:
             break
 
-        recorder.push(frame)
-
-        result = pipeline.run(frame)
-        fall_detected = fall.update(result["ratio"], result["is_pose_fall"])
-
-        draw_bbox(frame, result["bbox"])
-        draw_pose(pose, frame, result["bbox"], result["landmarks"])
-
-        status = "FALL" if fall_detected else "NORMAL"
-        system_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        draw_status(frame, status, fall.fall_counter, result["ratio"], system_time)
+        result = None
+        t0 = time.perf_counter()
+        if session.wants_detection(packet.frame):
+            result = pipeline.run(packet.frame)
+        session.process(packet, result, time.perf_counter() - t0)
+        profiler.record("frame", time.perf_counter() - t0)
+        profiler.maybe_export()
 
-        if events.should_start_event(fall_detected):
-            ts = events.start_event()
-            img_path = os.path.join(cfg.img_dir, f"fall_{ts}.jpg")
-            save_image(img_path, frame)
-            recorder.start()
+        now = time.monotonic()
+        if cfg.stats_interval_sec > 0 and now - last_stats >= cfg.stats_interval_sec:
+            print(f"[capture] {cap.stats.as_dict()}")
+            if hasattr(cap, "ring_stats"):
+                print(f"[shm] {cap.ring_stats()}")
+            print(f"[buffer] {session.recorder.buffer.stats()}")
+            if session.scheduler is not None:
+                print(f"[scheduler] {session.scheduler.stats()}")
+            if session.motion_gate is not None:
+                print(f"[motion] {session.motion_gate.stats()}")
+            last_stats = now
 
-        if events.state.recording:
-            recorder.append(frame)
-            if events.update_recording():
-                vid_path = os.path.join(cfg.vid_dir, f"fall_{events.state.ts}.mp4")
-                recorder.save(vid_path, fps, (w, h))
-                confidence = min(1.0, fall.fall_counter / max(cfg.fall_window, 1))
-                backend.ingest_event(
-                    {
-                        "camera_id": cfg.cam_id,
-                        "ts": datetime.now(timezone.utc).isoformat(),
-                        "confidence": confidence,
-                        "snapshot_path": img_path,
-                        "clip_path": vid_path,
-                        "meta": {"ratio": result["ratio"], "counter": fall.fall_counter},
-                    }
-                )
-
-        events.set_prev(fall_detected)
-
-        cv2.imshow("Realtime Fall Detection", frame)
-        if cv2.waitKey(1) == 27:
-            break
+        if not cfg.headless:
+            cv2.imshow("Realtime Fall Detection", packet.frame)
+            if cv2.waitKey(1) == 27:
+                break
 
-    cap.release()
-    cv2.destroyAllWindows()
+    # Frames may be views into a shared-memory ring; drop them before the capture closes.
+    packet = None
+    if heartbeat is not None:
+        heartbeat.stop()
+    if watcher is not None:
+        watcher.stop()
+    session.close()
+    backend.close()
+    if preview is not None:
+        preview.close()
+    if not cfg.headless:
+        cv2.destroyAllWindows()
@@ -0,0 +1,294 @@
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+from app.config import Settings
+from app.events.handler import FallEventHandler
+from app.inference.pipeline import InferencePipeline
+from app.logic.fall_logic import FallConfig
+from app.logic.temporal import make_fall_detector
+from app.overlay.draw import draw_bbox, draw_pose, draw_status
+from app.recording.buffer import make_frame_buffer
+from app.runtime.result_cache import ResultCacheWriter
+from app.runtime.startup import StartupTimeline, build_models, warm_up
+from app.video.capture import VideoCapture
+
+
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv")
+
+
+def list_videos(path: str) -> list[str]:
+    if os.path.isfile(path):
+        return [path]
+    return sorted(
+        os.path.join(root, name)
+        for root, _, files in os.walk(path)
+        for name in files
+        if name.lower().endswith(VIDEO_EXTS)
+    )
+
+
+def read_le2i_annotation(path: str) -> list[tuple[int, int]]:
+    # LE2I annotation files start with the fall start and end frame (1-based);
+    # 0/0 means the video contains no fall.
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        head = [line.strip() for line in f if line.strip()][:2]
+    try:
+        start, end = int(head[0]), int(head[1])
+    except (IndexError, ValueError):
+        return []
+    if start <= 0 and end <= 0:
+        return []
+    return [(start - 1, end - 1)]
+
+
+def load_ground_truth(path: str | None, videos: list[str]) -> dict[str, list[tuple[int, int]]] | None:
+    # Either a JSON file {"<video file name>": [[start, end], ...]} or a folder
+    # of LE2I-style .txt files named after the videos.
+    if not path:
+        return None
+    if os.path.isfile(path) and path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+        return {
+            os.path.basename(v): [tuple(map(int, iv)) for iv in raw.get(os.path.basename(v), [])]
+            for v in videos
+        }
+    gt = {}
+    for v in videos:
+        stem = os.path.splitext(os.path.basename(v))[0]
+        ann = os.path.join(path, f"{stem}.txt")
+        gt[os.path.basename(v)] = read_le2i_annotation(ann) if os.path.exists(ann) else []
+    return gt
+
+
+def match_events(onsets: list[int], intervals: list[tuple[int, int]], tol: int) -> dict:
+    matched_onsets = 0
+    for f in onsets:
+        if any(s - tol <= f <= e + tol for s, e in intervals):
+            matched_onsets += 1
+    delays = []
+    for s, e in intervals:
+        hits = [f for f in onsets if s - tol <= f <= e + tol]
+        if hits:
+            delays.append(min(hits) - s)
+    return {
+        "onsets": len(onsets),
+        "true_onsets": matched_onsets,
+        "intervals": len(intervals),
+        "detected": len(delays),
+        "delays": delays,
+    }
+
+
+def percentiles(values) -> dict:
+    if not values:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "mean": 0.0}
+    arr = np.asarray(values) * 1000
+    p50, p90, p99 = np.percentile(arr, [50, 90, 99])
+    return {
+        "p50": round(float(p50), 2),
+        "p90": round(float(p90), 2),
+        "p99": round(float(p99), 2),
+        "mean": round(float(arr.mean()), 2),
+    }
+
+
+class StageTimer:
+    def __init__(self) -> None:
+        self.samples = defaultdict(list)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.samples[stage].append(seconds)
+
+    def report(self) -> dict:
+        return {stage: percentiles(v) for stage, v in self.samples.items()}
+
+
+def replay_video(
+    path: str,
+    cfg: Settings,
+    pipeline,
+    pose,
+    timer: StageTimer,
+    writer_path=None,
+    cache_dir=None,
+) -> dict:
+    cap = VideoCapture(path)
+    fps = cap.fps()
+    cache = None
+    if cache_dir:
+        cache = ResultCacheWriter(
+            path,
+            fps,
+            meta={"model_path": cfg.model_path, "pose_source": cfg.pose_source, "conf": pipeline.conf},
+        )
+    fall = make_fall_detector(
+        cfg.fall_model,
+        FallConfig(
+            fall_window=cfg.fall_window,
+            aspect_ratio_thres=cfg.aspect_ratio_thres,
+            pose_y_diff=cfg.pose_y_diff,
+        ),
+    )
+    events = FallEventHandler(cfg.save_after, cfg.cooldown_sec, cfg.merge_sec)
+    buffer = make_frame_buffer(
+        cfg.buffer_mode, cfg.save_before, cfg.buffer_budget_mb, cfg.buffer_jpeg_quality
+    )
+    writer = None
+    if writer_path:
+        writer = cv2.VideoWriter(writer_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, cap.size())
+
+    onsets = []
+    idx = 0
+    while True:
+        t0 = time.perf_counter()
+        ret, frame = cap.read()
+        t1 = time.perf_counter()
+        if not ret:
+            break
+        timer.add("decode", t1 - t0)
+
+        buffer.append(frame)
+        t2 = time.perf_counter()
+        timer.add("buffer", t2 - t1)
+
+        result = pipeline.run(frame)
+        t3 = time.perf_counter()
+        timer.add("inference", t3 - t2)
+        if cache is not None:
+            cache.append(result)
+
+        best = result["best"]
+        fall_detected = fall.update(
+            result["ratio"],
+            result["is_pose_fall"],
+            result["bbox"],
+            result["joints"][best] if best >= 0 else None,
+            idx / fps,
+        )
+        now = idx / fps
+        if events.should_start_event(fall_detected, now):
+            events.start_event(now=now)
+            onsets.append(idx)
+        events.update_recording(now)
+        events.set_prev(fall_detected)
+        t4 = time.perf_counter()
+        timer.add("logic", t4 - t3)
+
+        if writer is not None:
+            draw_bbox(frame, result["bbox"])
+            draw_pose(pose, frame, result["pose_box"], result["landmarks"])
+            status = "FALL" if fall_detected else "NORMAL"
+            draw_status(frame, status, fall.fall_counter, result["ratio"], f"frame {idx}")
+            writer.write(frame)
+            timer.add("overlay_write", time.perf_counter() - t4)
+
+        timer.add("total", time.perf_counter() - t0)
+        idx += 1
+
+    cap.release()
+    if writer is not None:
+        writer.release()
+    if cache is not None:
+        cache.save(cache_dir)
+    return {"frames": idx, "fps": fps, "onsets": onsets}
+
+
+def run_replay(args) -> dict:
+    cfg = Settings()
+    videos = list_videos(args.source or cfg.video_path)
+    if not videos:
+        raise RuntimeError(f"No videos found at {args.source or cfg.video_path}")
+    gt = load_ground_truth(args.gt, videos)
+
+    timeline = StartupTimeline()
+    detector, pose = build_models(cfg, timeline)
+    pipeline = InferencePipeline(
+        detector,
+        pose,
+        cfg.pose_y_diff,
+        cfg.pose_source,
+        crop_size=cfg.pose_crop_size,
+        crop_expand=cfg.pose_crop_expand,
+        crop_alpha=cfg.pose_crop_alpha,
+    )
+    warm_up(detector, [pose], (640, 480), timeline)
+
+    timer = StageTimer()
+    per_video = {}
+    totals = {"onsets": 0, "true_onsets": 0, "intervals": 0, "detected": 0}
+    delays_sec = []
+    frames = 0
+    started = time.perf_counter()
+    for i, path in enumerate(videos):
+        # MediaPipe and crop tracking state must not leak between clips.
+        if i > 0:
+            pipeline.reset_tracking(pose)
+        out = None
+        if args.output:
+            out = args.output if len(videos) == 1 else f"{os.path.splitext(args.output)[0]}_{i}.mp4"
+        run = replay_video(path, cfg, pipeline, pose, timer, out, args.cache)
+        frames += run["frames"]
+        entry = {"frames": run["frames"], "onsets": run["onsets"]}
+        if gt is not None:
+            m = match_events(run["onsets"], gt.get(os.path.basename(path), []), int(args.tol_sec * run["fps"]))
+            for key in totals:
+                totals[key] += m[key]
+            delays_sec.extend(d / run["fps"] for d in m["delays"])
+            entry.update({k: v for k, v in m.items() if k != "delays"})
+        per_video[os.path.basename(path)] = entry
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "videos": len(videos),
+        "frames": frames,
+        "elapsed_sec": round(elapsed, 2),
+        "fps": round(frames / max(elapsed, 1e-9), 2),
+        "stages_ms": timer.report(),
+        "per_video": per_video,
+    }
+    if gt is not None:
+        report["accuracy"] = {
+            "precision": round(totals["true_onsets"] / max(totals["onsets"], 1), 3),
+            "recall": round(totals["detected"] / max(totals["intervals"], 1), 3),
+            "delay_sec_mean": round(float(np.mean(delays_sec)), 2) if delays_sec else None,
+            "delay_sec_max": round(float(np.max(delays_sec)), 2) if delays_sec else None,
+            **totals,
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay video files through the fall pipeline.")
+    parser.add_argument("source", nargs="?", help="Video file or folder (default: VIDEO_PATH)")
+    parser.add_argument("--gt", help="LE2I annotation folder or JSON {video: [[start, end], ...]}")
+    parser.add_argument("--tol-sec", type=float, default=1.0, help="Slack around GT intervals")
+    parser.add_argument(
+        "--output",
+        nargs="?",
+        const=Settings().output_path,
+        help="Write an annotated video (bare flag: OUTPUT_PATH)",
+    )
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument(
+        "--cache",
+        help="Write per-frame pipeline outputs here for `python -m app.runtime.sweep`",
+    )
+    args = parser.parse_args()
+
+    report = run_replay(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import glob
+import hashlib
+import os
+
+import numpy as np
+
+
+def cache_path(cache_dir: str, source: str) -> str:
+    # Same file name in different folders must not collide.
+    digest = hashlib.sha1(os.path.abspath(source).encode("utf-8")).hexdigest()[:8]
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(cache_dir, f"{stem}-{digest}.npz")
+
+
+class ResultCacheWriter:
+    # Columnar per-frame pipeline outputs for one video: enough to replay the
+    # fall logic with other thresholds without running the models again.
+    def __init__(self, source: str, fps: float, meta: dict | None = None) -> None:
+        self.source = source
+        self.fps = fps
+        self.meta = meta or {}
+        self.rows = {"bbox": [], "score": [], "ratio": [], "pose_dy": [], "joints": []}
+
+    def append(self, result: dict) -> None:
+        best = result["best"]
+        det = result["detections"]
+        self.rows["bbox"].append(result["bbox"] if result["bbox"] is not None else (-1, -1, -1, -1))
+        self.rows["score"].append(float(det.scores[best]) if best >= 0 else 0.0)
+        self.rows["ratio"].append(result["ratio"])
+        self.rows["pose_dy"].append(result["pose_dy"])
+        if best >= 0:
+            self.rows["joints"].append(result["joints"][best])
+        else:
+            self.rows["joints"].append(np.full((4, 3), np.nan, np.float32))
+
+    def save(self, cache_dir: str) -> str:
+        os.makedirs(cache_dir, exist_ok=True)
+        path = cache_path(cache_dir, self.source)
+        n = len(self.rows["ratio"])
+        np.savez_compressed(
+            path,
+            source=os.path.basename(self.source),
+            fps=self.fps,
+            frame_idx=np.arange(n, dtype=np.int32),
+            bbox=np.asarray(self.rows["bbox"], np.int32).reshape(n, 4),
+            score=np.asarray(self.rows["score"], np.float32),
+            ratio=np.asarray(self.rows["ratio"], np.float32),
+            pose_dy=np.asarray(self.rows["pose_dy"], np.float32),
+            joints=np.asarray(self.rows["joints"], np.float32).reshape(n, 4, 3),
+            **{f"meta_{k}": v for k, v in self.meta.items()},
+        )
+        return path
+
+
+def load_cache(path: str) -> dict:
+    with np.load(path) as data:
+        out = {k: data[k] for k in data.files}
+    out["source"] = str(out["source"])
+    out["fps"] = float(out["fps"])
+    return out
+
+
+def load_cache_dir(cache_dir: str) -> list[dict]:
+    return [load_cache(p) for p in sorted(glob.glob(os.path.join(cache_dir, "*.npz")))]
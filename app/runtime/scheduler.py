@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+
+
+class InferenceScheduler:
+    # Runs full inference every `idle_interval` frames while the scene is calm
+    # and on every frame once the fall counter rises or people move. When a
+    # motion gate reports a static scene (motion=False) inference is skipped
+    # outright. Skipped frames reuse the last result with the main box
+    # extrapolated at constant velocity.
+    def __init__(self, idle_interval: int, hold_frames: int = 30, motion_thres: float = 0.05) -> None:
+        self.idle_interval = max(int(idle_interval), 1)
+        self.hold_frames = hold_frames
+        self.motion_thres = motion_thres
+        self.last_result: dict | None = None
+        self.since_detect = 0
+        self.hot = 0
+        self.velocity = np.zeros(4, np.float32)
+        self.started = time.monotonic()
+        self.frames = 0
+        self.inferences = 0
+        self.infer_sec = 0.0
+
+    def should_detect(self, fall_counter: int, motion: bool | None = None) -> bool:
+        self.frames += 1
+        if motion:
+            self.hot = self.hold_frames
+        if self.last_result is None or fall_counter > 0:
+            return True
+        if motion is not False and (self.hot > 0 or self.since_detect + 1 >= self.idle_interval):
+            return True
+        self.since_detect += 1
+        self.hot = max(self.hot - 1, 0)
+        return False
+
+    def record(self, result: dict, infer_sec: float = 0.0) -> None:
+        prev = self.last_result
+        frames_apart = self.since_detect + 1
+        self.inferences += 1
+        self.infer_sec += infer_sec
+        self.since_detect = 0
+        self.hot = max(self.hot - 1, 0)
+        self.last_result = result
+        self.velocity[:] = 0
+        if prev is None or len(prev["detections"]) != len(result["detections"]):
+            self.hot = self.hold_frames
+            return
+        if prev["bbox"] is None or result["bbox"] is None:
+            return
+        a = np.asarray(prev["bbox"], np.float32)
+        b = np.asarray(result["bbox"], np.float32)
+        self.velocity = (b - a) / frames_apart
+        height = max(b[3] - b[1], 1.0)
+        shift = np.abs((b[:2] + b[2:]) - (a[:2] + a[2:])).max() / 2
+        if shift > self.motion_thres * height:
+            self.hot = self.hold_frames
+
+    def propagate(self) -> dict:
+        result = dict(self.last_result)
+        if result["bbox"] is not None:
+            box = np.asarray(result["bbox"], np.float32) + self.velocity * self.since_detect
+            result["bbox"] = tuple(int(v) for v in box)
+        # Landmarks belong to the detected frame and would be drawn out of place.
+        result["landmarks"] = None
+        return result
+
+    def stats(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        skipped = self.frames - self.inferences
+        mean_infer = self.infer_sec / max(self.inferences, 1)
+        return {
+            "frames": self.frames,
+            "inferences": self.inferences,
+            "inference_fps": round(self.inferences / elapsed, 2),
+            "skipped_pct": round(100 * skipped / max(self.frames, 1), 1),
+            "saved_cpu_ms_per_sec": round(1000 * skipped * mean_infer / elapsed, 1),
+        }
@@ -0,0 +1,11 @@
+import signal
+import threading
+
+# Set on SIGTERM. The frame loops exit before their next frame and close their
+# sessions, so a clip being recorded is finished and spooled before exit.
+stop_requested = threading.Event()
+
+
+def install_sigterm_handler() -> None:
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: stop_requested.set())
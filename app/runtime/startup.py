@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class StartupTimeline:
+    def __init__(self) -> None:
+        self.t0 = time.perf_counter()
+        self.phases: list[tuple[str, float, float]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.phases.append((name, start - self.t0, end - self.t0))
+
+    def report(self) -> dict:
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p[1])
+        return {
+            "total_ms": round((time.perf_counter() - self.t0) * 1000, 1),
+            "phases": [
+                {
+                    "name": name,
+                    "start_ms": round(start * 1000, 1),
+                    "ms": round((end - start) * 1000, 1),
+                }
+                for name, start, end in phases
+            ],
+        }
+
+    def emit(self) -> None:
+        print(f"[startup] {json.dumps(self.report())}")
+
+
+class BackgroundLoad:
+    # Runs a loader on a thread so slow model construction overlaps with
+    # opening cameras; result() re-raises any loader error.
+    def __init__(self, fn, *args) -> None:
+        self._value = None
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, args=(fn, args), name="model-load", daemon=True)
+        self._thread.start()
+
+    def _run(self, fn, args) -> None:
+        try:
+            self._value = fn(*args)
+        except BaseException as exc:
+            self._error = exc
+
+    def result(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+def build_models(cfg, timeline: StartupTimeline):
+    from app.inference.detector import YoloPoseDetector
+    from app.inference.pose import PoseEstimator
+
+    with timeline.phase("model_load"):
+        detector = YoloPoseDetector(
+            cfg.model_path,
+            backend=cfg.infer_backend,
+            imgsz=cfg.infer_imgsz,
+            threads=cfg.infer_threads,
+        )
+    pose = None
+    if cfg.pose_source == "mediapipe":
+        with timeline.phase("pose_load"):
+            pose = PoseEstimator()
+    return detector, pose
+
+
+def warm_up(detector, poses, size: tuple[int, int], timeline: StartupTimeline) -> None:
+    # First calls pay for lazy kernel/graph setup; pay it before reporting ready.
+    w, h = size
+    dummy = np.zeros((max(h, 32), max(w, 32), 3), np.uint8)
+    with timeline.phase("warmup"):
+        detector.infer(dummy)
+        for pose in poses:
+            if pose is not None:
+                pose.process(dummy)
@@ -0,0 +1,220 @@
+import argparse
+import itertools
+import json
+import time
+
+import numpy as np
+
+from app.config import Settings
+from app.events.handler import FallEventHandler
+from app.logic.fall_logic import FallConfig, FallDetector
+from app.runtime.replay import load_ground_truth, match_events
+from app.runtime.result_cache import load_cache_dir
+
+
+def parse_range(text: str, cast=float) -> list:
+    # "4:16:2" (stop inclusive) or "1.2,1.4,1.6".
+    if ":" in text:
+        start, stop, step = (float(v) for v in text.split(":"))
+        values = np.arange(start, stop + step / 2, step)
+        return [cast(round(v, 6)) for v in values]
+    return [cast(v) for v in text.split(",")]
+
+
+def build_grid(args) -> dict[str, np.ndarray]:
+    combos = list(
+        itertools.product(
+            parse_range(args.fall_window, int),
+            parse_range(args.aspect_ratio_thres),
+            parse_range(args.pose_y_diff),
+            parse_range(args.cooldown_sec),
+        )
+    )
+    cols = np.array(combos, np.float64).reshape(-1, 4)
+    return {
+        "fall_window": cols[:, 0].astype(np.int64),
+        "aspect_ratio_thres": cols[:, 1],
+        "pose_y_diff": cols[:, 2],
+        "cooldown_sec": cols[:, 3],
+    }
+
+
+def sweep_video(cache: dict, grid: dict, save_after: int, merge_sec: float) -> np.ndarray:
+    # FallDetector and FallEventHandler (single-person path) stepped frame by
+    # frame, with every config in one NumPy row. Returns event starts (configs x frames).
+    n = len(grid["fall_window"])
+    frames = len(cache["ratio"])
+    fps = cache["fps"]
+    ratio = cache["ratio"]
+    pose_dy = cache["pose_dy"]
+    ar, neg_pyd = grid["aspect_ratio_thres"], -grid["pose_y_diff"]
+    fw, cooldown = grid["fall_window"], grid["cooldown_sec"]
+
+    counter = np.zeros(n, np.int64)
+    prev = np.zeros(n, bool)
+    recording = np.zeros(n, bool)
+    after = np.zeros(n, np.int64)
+    started = np.zeros(n)
+    ended = np.full(n, -np.inf)
+    starts = np.zeros((n, frames), bool)
+    with np.errstate(invalid="ignore"):
+        for t in range(frames):
+            now = t / fps
+            hit = (ratio[t] > ar) | (pose_dy[t] > neg_pyd)
+            counter = np.where(hit, counter + 1, np.maximum(counter - 1, 0))
+            fall = counter >= fw
+
+            rising = fall & ~prev
+            after[rising & recording & (now - started <= merge_sec)] = 0
+            start = rising & ~recording & (now - ended >= cooldown)
+            recording |= start
+            after[start] = 0
+            started[start] = now
+            starts[:, t] = start
+
+            after += recording
+            done = recording & (after >= save_after)
+            recording &= ~done
+            ended[done] = now
+            prev = fall
+    return starts
+
+
+def score_video(starts: np.ndarray, intervals, tol: int, fps: float) -> dict:
+    # match_events for every config at once.
+    n, frames = starts.shape
+    inside = np.zeros(frames, bool)
+    for s, e in intervals:
+        inside[max(s - tol, 0) : e + tol + 1] = True
+    out = {
+        "onsets": starts.sum(axis=1),
+        "true_onsets": (starts & inside).sum(axis=1),
+        "intervals": np.full(n, len(intervals)),
+        "detected": np.zeros(n, np.int64),
+        "delay_sum": np.zeros(n),
+        "delay_max": np.zeros(n),
+    }
+    for s, e in intervals:
+        lo, hi = max(s - tol, 0), min(e + tol + 1, frames)
+        if lo >= hi:
+            continue
+        window = starts[:, lo:hi]
+        has = window.any(axis=1)
+        delay = (window.argmax(axis=1) + lo - s) / fps
+        out["detected"] += has
+        out["delay_sum"] += np.where(has, delay, 0.0)
+        out["delay_max"] = np.maximum(out["delay_max"], np.where(has, delay, 0.0))
+    return out
+
+
+def replay_one(cache: dict, fall_cfg: FallConfig, save_after: int, cooldown: float, merge: float):
+    # The real classes for a single config; used to check the vectorized path.
+    fall = FallDetector(fall_cfg)
+    events = FallEventHandler(save_after, cooldown, merge)
+    onsets = []
+    for t in range(len(cache["ratio"])):
+        now = t / cache["fps"]
+        is_pose_fall = bool(cache["pose_dy"][t] > -fall_cfg.pose_y_diff)
+        fall_detected = fall.update(float(cache["ratio"][t]), is_pose_fall)
+        if events.should_start_event(fall_detected, now):
+            events.start_event(now=now)
+            onsets.append(t)
+        events.update_recording(now)
+        events.set_prev(fall_detected)
+    return onsets
+
+
+def run_sweep(args) -> dict:
+    cfg = Settings()
+    caches = load_cache_dir(args.cache)
+    if not caches:
+        raise RuntimeError(f"No cached results in {args.cache}; run replay with --cache first")
+    gt = load_ground_truth(args.gt, [c["source"] for c in caches])
+    grid = build_grid(args)
+    n = len(grid["fall_window"])
+
+    started = time.perf_counter()
+    totals = None
+    for cache in caches:
+        starts = sweep_video(cache, grid, cfg.save_after, cfg.merge_sec)
+        m = score_video(starts, gt.get(cache["source"], []), int(args.tol_sec * cache["fps"]), cache["fps"])
+        if totals is None:
+            totals = m
+        else:
+            for k in totals:
+                totals[k] = np.maximum(totals[k], m[k]) if k == "delay_max" else totals[k] + m[k]
+    elapsed = time.perf_counter() - started
+
+    precision = totals["true_onsets"] / np.maximum(totals["onsets"], 1)
+    recall = totals["detected"] / np.maximum(totals["intervals"], 1)
+    f1 = 2 * precision * recall / np.maximum(precision + recall, 1e-9)
+    order = np.lexsort((-precision, -f1))[: args.top]
+
+    top = []
+    for i in order:
+        top.append(
+            {
+                "fall_window": int(grid["fall_window"][i]),
+                "aspect_ratio_thres": float(grid["aspect_ratio_thres"][i]),
+                "pose_y_diff": float(grid["pose_y_diff"][i]),
+                "cooldown_sec": float(grid["cooldown_sec"][i]),
+                "precision": round(float(precision[i]), 3),
+                "recall": round(float(recall[i]), 3),
+                "f1": round(float(f1[i]), 3),
+                "onsets": int(totals["onsets"][i]),
+                "delay_sec_mean": round(float(totals["delay_sum"][i] / max(totals["detected"][i], 1)), 2),
+                "delay_sec_max": round(float(totals["delay_max"][i]), 2),
+            }
+        )
+
+    report = {
+        "videos": len(caches),
+        "frames": int(sum(len(c["ratio"]) for c in caches)),
+        "configs": n,
+        "elapsed_sec": round(elapsed, 2),
+        "top": top,
+    }
+    if top:
+        # Cross-check the winner with FallDetector/FallEventHandler and match_events.
+        best = top[0]
+        fall_cfg = FallConfig(best["fall_window"], best["aspect_ratio_thres"], best["pose_y_diff"])
+        true_onsets = onsets = 0
+        for cache in caches:
+            found = replay_one(cache, fall_cfg, cfg.save_after, best["cooldown_sec"], cfg.merge_sec)
+            m = match_events(found, gt.get(cache["source"], []), int(args.tol_sec * cache["fps"]))
+            onsets += m["onsets"]
+            true_onsets += m["true_onsets"]
+        report["check"] = {
+            "onsets": onsets,
+            "true_onsets": true_onsets,
+            "matches": onsets == best["onsets"],
+        }
+    return report
+
+
+def main() -> None:
+    cfg = Settings()
+    parser = argparse.ArgumentParser(
+        description="Sweep fall thresholds over cached replay results (see replay --cache)."
+    )
+    parser.add_argument("cache", help="Folder of .npz files written by replay --cache")
+    parser.add_argument("--gt", required=True, help="LE2I annotation folder or JSON, as for replay")
+    parser.add_argument("--tol-sec", type=float, default=1.0)
+    parser.add_argument("--fall-window", default="2:24:1", help="start:stop:step or a,b,c")
+    parser.add_argument("--aspect-ratio-thres", default="0.8:2.4:0.05")
+    parser.add_argument("--pose-y-diff", default="0:0.3:0.02")
+    parser.add_argument("--cooldown-sec", default=str(cfg.cooldown_sec))
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = run_sweep(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
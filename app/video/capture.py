@@ -1,11 +1,55 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
 import cv2
 
+from app.profiling import profiler
+
+
+@dataclass
+class FramePacket:
+    frame: object
+    seq: int
+    captured_at: float
+
+
+class CaptureStats:
+    def __init__(self, window: int = 300) -> None:
+        self.grabbed = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.latencies = deque(maxlen=window)
+
+    def record_latency(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+
+    def as_dict(self) -> dict:
+        lat = sorted(self.latencies)
+        if lat:
+            mean_ms = sum(lat) / len(lat) * 1000
+            p95_ms = lat[min(int(len(lat) * 0.95), len(lat) - 1)] * 1000
+            last_ms = self.latencies[-1] * 1000
+        else:
+            mean_ms = p95_ms = last_ms = 0.0
+        return {
+            "grabbed": self.grabbed,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "latency_ms_last": round(last_ms, 1),
+            "latency_ms_mean": round(mean_ms, 1),
+            "latency_ms_p95": round(p95_ms, 1),
+        }
+
 
 class VideoCapture:
-    def __init__(self, cam_id: int) -> None:
-        self.cap = cv2.VideoCapture(cam_id)
+    def __init__(self, source) -> None:
+        self.cap = cv2.VideoCapture(source)
         if not self.cap.isOpened():
-            raise RuntimeError("Cannot open webcam")
+            raise RuntimeError(f"Cannot open video source {source!r}")
+        self.stats = CaptureStats()
+        self._seq = 0
 
     def fps(self) -> float:
         return self.cap.get(cv2.CAP_PROP_FPS) or 30
@@ -18,6 +62,166 @@ class VideoCapture:
     def read(self):
         return self.cap.read()
 
+    def read_packet(self) -> FramePacket | None:
+        with profiler.stage("decode"):
+            ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self._seq += 1
+        self.stats.grabbed += 1
+        self.stats.delivered += 1
+        return FramePacket(frame, self._seq, time.monotonic())
+
+    def mark_decision(self, packet: FramePacket) -> None:
+        self.stats.record_latency(time.monotonic() - packet.captured_at)
+
     def release(self) -> None:
         self.cap.release()
 
+
+class LatestFrameReader:
+    # Every frame is grabbed so the OpenCV/FFmpeg buffer never backs up, but
+    # only the first grab after a request is retrieved (decoded), so skipped
+    # frames cost a grab() and nothing more. The request is cleared once that
+    # frame is decoded; frames grabbed without a request count as dropped.
+    def __init__(self, cap: VideoCapture, read_timeout: float = 5.0) -> None:
+        self.cap = cap
+        self.read_timeout = read_timeout
+        self.stats = cap.stats
+        self._cond = threading.Condition()
+        self._wanted = False
+        self._packet: FramePacket | None = None
+        self._last_seq = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._loop, name="capture", daemon=True)
+        self._thread.start()
+
+    def fps(self) -> float:
+        return self.cap.fps()
+
+    def size(self) -> tuple[int, int]:
+        return self.cap.size()
+
+    def _loop(self) -> None:
+        seq = 0
+        while not self._stopped:
+            if not self.cap.cap.grab():
+                break
+            seq += 1
+            captured_at = time.monotonic()
+            self.stats.grabbed += 1
+            with self._cond:
+                wanted = self._wanted
+            if not wanted:
+                self.stats.dropped += 1
+                continue
+            with profiler.stage("decode"):
+                ret, frame = self.cap.cap.retrieve()
+            if not ret:
+                break
+            with self._cond:
+                self._packet = FramePacket(frame, seq, captured_at)
+                self._wanted = False
+                self._cond.notify_all()
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def request(self) -> None:
+        # Lets a caller ask several readers for a frame before blocking on any.
+        with self._cond:
+            self._wanted = True
+
+    def _fresh(self) -> bool:
+        return self._packet is not None and self._packet.seq > self._last_seq
+
+    def read_packet(self) -> FramePacket | None:
+        with self._cond:
+            # No new request while a frame decoded for request() is still unread.
+            if not self._fresh():
+                self._wanted = True
+            ok = self._cond.wait_for(
+                lambda: self._stopped or self._fresh(),
+                timeout=self.read_timeout,
+            )
+            packet = self._packet
+            if not ok or packet is None or packet.seq <= self._last_seq:
+                return None
+            self._last_seq = packet.seq
+        self.stats.delivered += 1
+        return packet
+
+    def read(self):
+        packet = self.read_packet()
+        if packet is None:
+            return False, None
+        return True, packet.frame
+
+    def mark_decision(self, packet: FramePacket) -> None:
+        self.stats.record_latency(time.monotonic() - packet.captured_at)
+
+    def release(self) -> None:
+        self._stopped = True
+        self._thread.join(timeout=1.0)
+        self.cap.release()
+
+
+def is_live_source(source) -> bool:
+    # Webcams and network streams can come back after a hiccup; files just end.
+    if isinstance(source, int):
+        return True
+    return "://" in str(source) and not str(source).startswith("file://")
+
+
+class CaptureReopener:
+    # Reopens a dropped live source on its own thread with exponential
+    # backoff, so a dead camera never stalls the others.
+    def __init__(self, source, mode: str, shm_slots: int, max_backoff: float = 30.0) -> None:
+        self.source = source
+        self.mode = mode
+        self.shm_slots = shm_slots
+        self.max_backoff = max_backoff
+        self.attempts = 0
+        self._cap = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="capture-reopen", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        delay = 1.0
+        while not self._stopped.wait(delay):
+            self.attempts += 1
+            try:
+                cap = open_capture(self.source, self.mode, self.shm_slots)
+            except RuntimeError as exc:
+                print(f"[capture] reopen attempt {self.attempts} failed: {exc}")
+                delay = min(self.max_backoff, delay * 2)
+                continue
+            if self._stopped.is_set():
+                cap.release()
+            else:
+                self._cap = cap
+            return
+
+    def take(self):
+        # The reopened capture once, or None while still trying.
+        cap, self._cap = self._cap, None
+        return cap
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join(timeout=1.0)
+        cap = self.take()
+        if cap is not None:
+            cap.release()
+
+
+def open_capture(source, mode: str = "latest", shm_slots: int = 8):
+    if mode == "process":
+        from app.video.shm_capture import SharedMemoryFrameReader
+
+        return SharedMemoryFrameReader(source, slots=shm_slots)
+    cap = VideoCapture(source)
+    if mode == "latest":
+        return LatestFrameReader(cap)
+    return cap
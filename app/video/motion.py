@@ -0,0 +1,86 @@
+import json
+
+import cv2
+import numpy as np
+
+
+def parse_zones(value) -> list:
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = json.loads(value)
+    return list(value)
+
+
+def zone_polygon(zone, w: int, h: int) -> np.ndarray:
+    # A zone is either a normalised [x1, y1, x2, y2] rectangle or a list of
+    # normalised [x, y] polygon points.
+    if len(zone) == 4 and not isinstance(zone[0], (list, tuple)):
+        x1, y1, x2, y2 = zone
+        zone = [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+    pts = np.asarray(zone, np.float32) * np.array([w, h], np.float32)
+    return pts.round().astype(np.int32)
+
+
+class MotionGate:
+    # Cheap change detector on a small blurred grayscale frame against a running
+    # average background. Only pixels inside the ROI and outside masked zones
+    # (TVs, windows, ...) count.
+    def __init__(
+        self,
+        width: int = 160,
+        threshold: int = 25,
+        min_area: float = 0.002,
+        alpha: float = 0.05,
+        roi=None,
+        masks=None,
+    ) -> None:
+        self.width = width
+        self.threshold = threshold
+        self.min_area = min_area
+        self.alpha = alpha
+        self.roi = parse_zones(roi)
+        self.masks = parse_zones(masks)
+        self.mask: np.ndarray | None = None
+        self.background: np.ndarray | None = None
+        self.motion_ratio = 0.0
+        self.frames = 0
+        self.static_frames = 0
+
+    def _build_mask(self, h: int, w: int) -> np.ndarray:
+        if self.roi:
+            mask = np.zeros((h, w), np.uint8)
+            for zone in self.roi:
+                cv2.fillPoly(mask, [zone_polygon(zone, w, h)], 1)
+        else:
+            mask = np.ones((h, w), np.uint8)
+        for zone in self.masks:
+            cv2.fillPoly(mask, [zone_polygon(zone, w, h)], 0)
+        return mask.astype(bool)
+
+    def update(self, frame) -> bool:
+        self.frames += 1
+        h, w = frame.shape[:2]
+        small_h = max(int(h * self.width / w), 1)
+        small = cv2.resize(frame, (self.width, small_h), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            self.mask = self._build_mask(*gray.shape)
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        cv2.accumulateWeighted(gray, self.background, self.alpha)
+        moving = (diff > self.threshold) & self.mask
+        self.motion_ratio = float(moving.sum()) / max(int(self.mask.sum()), 1)
+        if self.motion_ratio >= self.min_area:
+            return True
+        self.static_frames += 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "static_pct": round(100 * self.static_frames / max(self.frames, 1), 1),
+            "motion_ratio": round(self.motion_ratio, 4),
+        }
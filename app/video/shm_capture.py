@@ -0,0 +1,156 @@
+import multiprocessing as mp
+import queue
+import time
+
+from app.video.capture import CaptureStats, FramePacket
+from app.video.shm_ring import SharedFrameRing, SlotMeta
+
+
+def _decode_loop(source, slots: int, lock, info_conn, meta_queue, stop_event) -> None:
+    import cv2
+
+    cap = cv2.VideoCapture(source)
+    ok, frame = cap.read() if cap.isOpened() else (False, None)
+    if not ok:
+        info_conn.send({"error": f"Cannot open video source {source!r}"})
+        return
+    ring = SharedFrameRing(frame.shape, lock, slots=slots)
+    info_conn.send(
+        {
+            "name": ring.name,
+            "shape": frame.shape,
+            "fps": cap.get(cv2.CAP_PROP_FPS) or 30,
+        }
+    )
+    try:
+        while not stop_event.is_set():
+            if frame.shape != ring.shape:
+                frame = cv2.resize(frame, (ring.shape[1], ring.shape[0]))
+            meta = ring.write(frame, time.monotonic())
+            try:
+                meta_queue.put_nowait((meta.slot, meta.seq, meta.captured_at))
+            except queue.Full:
+                pass
+            ok, frame = cap.read()
+            if not ok:
+                break
+    finally:
+        try:
+            cap.release()
+            _put_end(meta_queue)
+            # Give the consumer a moment to detach before the segment is unlinked.
+            stop_event.wait(2.0)
+        finally:
+            ring.close()
+
+
+def _put_end(meta_queue, attempts: int = 3) -> None:
+    # The consumer may not be reading (it is closing its session), so never
+    # block: make room by discarding the oldest announcement instead.
+    for _ in range(attempts):
+        try:
+            meta_queue.put_nowait((-1, -1, 0.0))
+            return
+        except queue.Full:
+            pass
+        try:
+            meta_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+
+class SharedMemoryFrameReader:
+    # Decodes in a child process into a SharedFrameRing; only slot numbers
+    # cross the process boundary. Frames handed out are views into shared
+    # memory and stay valid until the next read_packet().
+    def __init__(self, source, slots: int = 8, open_timeout: float = 20.0, read_timeout: float = 5.0) -> None:
+        if slots < 2:
+            raise ValueError(f"CAPTURE_SHM_SLOTS must be at least 2, got {slots}")
+        ctx = mp.get_context("spawn")
+        self.lock = ctx.Lock()
+        parent_conn, child_conn = ctx.Pipe(duplex=False)
+        self.meta_queue = ctx.Queue(maxsize=slots)
+        self.stop_event = ctx.Event()
+        self.read_timeout = read_timeout
+        self.proc = ctx.Process(
+            target=_decode_loop,
+            args=(source, slots, self.lock, child_conn, self.meta_queue, self.stop_event),
+            name="shm-capture",
+            daemon=True,
+        )
+        self.proc.start()
+        if not parent_conn.poll(open_timeout):
+            self.proc.terminate()
+            raise RuntimeError(f"Timed out opening video source {source!r}")
+        info = parent_conn.recv()
+        if "error" in info:
+            raise RuntimeError(info["error"])
+        self.ring = SharedFrameRing(
+            tuple(info["shape"]), self.lock, slots=slots, name=info["name"], create=False
+        )
+        self._fps = info["fps"]
+        self.stats = CaptureStats()
+        self._ended = False
+        # The packet last handed out; its frame is a view into the ring.
+        self._packet: FramePacket | None = None
+
+    def fps(self) -> float:
+        return self._fps
+
+    def size(self) -> tuple[int, int]:
+        h, w = self.ring.shape[:2]
+        return w, h
+
+    def request(self) -> None:
+        pass
+
+    def read_packet(self) -> FramePacket | None:
+        self._packet = None
+        while not self._ended:
+            self.ring.release()
+            try:
+                msg = self.meta_queue.get(timeout=self.read_timeout)
+            except queue.Empty:
+                return None
+            # Skip to the newest announced frame.
+            while True:
+                try:
+                    msg = self.meta_queue.get_nowait()
+                    self.stats.dropped += 1
+                except queue.Empty:
+                    break
+            slot, seq, captured_at = msg
+            if slot < 0:
+                self._ended = True
+                return None
+            self.stats.grabbed = seq
+            frame = self.ring.read(SlotMeta(slot, seq, captured_at))
+            if frame is None:
+                # Overwritten before it could be held; wait for the next one.
+                self.stats.dropped += 1
+                continue
+            self.stats.delivered += 1
+            self._packet = FramePacket(frame, seq, captured_at)
+            return self._packet
+        return None
+
+    def read(self):
+        packet = self.read_packet()
+        if packet is None:
+            return False, None
+        return True, packet.frame
+
+    def mark_decision(self, packet: FramePacket) -> None:
+        self.stats.record_latency(time.monotonic() - packet.captured_at)
+
+    def ring_stats(self) -> dict:
+        return self.ring.stats()
+
+    def release(self) -> None:
+        self.stop_event.set()
+        self._packet = None
+        self.ring.release()
+        self.ring.close()
+        self.proc.join(timeout=3)
+        if self.proc.is_alive():
+            self.proc.terminate()
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# Control words stored at the head of the segment.
+CTRL_WRITE_SEQ, CTRL_READ_SEQ, CTRL_HELD_SLOT, CTRL_OVERWRITES, CTRL_DROPS = range(5)
+CTRL_WORDS = 8
+
+
+@dataclass
+class SlotMeta:
+    slot: int
+    seq: int
+    captured_at: float
+
+
+class SharedFrameRing:
+    # Preallocated frame slots in one shared memory segment, viewed as NumPy
+    # arrays. The producer writes into a slot and announces (slot, seq) with a
+    # small message; the consumer maps that slot without copying. The slot the
+    # consumer currently holds is never overwritten. The control words and
+    # per-slot seqs are only touched under `lock`, a multiprocessing lock
+    # shared by both sides; frame data is copied outside it.
+    def __init__(
+        self,
+        shape: tuple[int, int, int],
+        lock,
+        slots: int = 8,
+        name: str | None = None,
+        create: bool = True,
+    ) -> None:
+        if slots < 2:
+            raise ValueError(f"SharedFrameRing needs at least 2 slots, got {slots}")
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.lock = lock
+        frame_bytes = int(np.prod(self.shape))
+        header = (CTRL_WORDS + 2 * slots) * 8
+        size = header + slots * frame_bytes
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self.owner = create
+        buf = self.shm.buf
+        self.ctrl = np.ndarray((CTRL_WORDS,), np.int64, buffer=buf, offset=0)
+        self.seqs = np.ndarray((slots,), np.int64, buffer=buf, offset=CTRL_WORDS * 8)
+        self.stamps = np.ndarray((slots,), np.float64, buffer=buf, offset=(CTRL_WORDS + slots) * 8)
+        self.frames = np.ndarray((slots,) + self.shape, np.uint8, buffer=buf, offset=header)
+        if create:
+            self.ctrl[:] = 0
+            self.ctrl[CTRL_HELD_SLOT] = -1
+            self.seqs[:] = 0
+        self._next_slot = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, frame, captured_at: float) -> SlotMeta:
+        with self.lock:
+            slot = self._next_slot
+            if slot == self.ctrl[CTRL_HELD_SLOT]:
+                slot = (slot + 1) % self.slots
+            if self.seqs[slot] > self.ctrl[CTRL_READ_SEQ]:
+                self.ctrl[CTRL_OVERWRITES] += 1
+            self.seqs[slot] = -1  # mark as being written
+        self._next_slot = (slot + 1) % self.slots
+
+        self.frames[slot][...] = frame
+        with self.lock:
+            seq = int(self.ctrl[CTRL_WRITE_SEQ]) + 1
+            self.stamps[slot] = captured_at
+            self.seqs[slot] = seq
+            self.ctrl[CTRL_WRITE_SEQ] = seq
+        return SlotMeta(slot, seq, captured_at)
+
+    def read(self, meta: SlotMeta):
+        with self.lock:
+            if self.seqs[meta.slot] != meta.seq:
+                self.ctrl[CTRL_DROPS] += 1
+                return None
+            self.ctrl[CTRL_HELD_SLOT] = meta.slot
+            self.ctrl[CTRL_READ_SEQ] = meta.seq
+        return self.frames[meta.slot]
+
+    def release(self) -> None:
+        with self.lock:
+            self.ctrl[CTRL_HELD_SLOT] = -1
+
+    def stats(self) -> dict:
+        write_seq = int(self.ctrl[CTRL_WRITE_SEQ])
+        read_seq = int(self.ctrl[CTRL_READ_SEQ])
+        return {
+            "slots": self.slots,
+            "occupancy": min(write_seq - read_seq, self.slots),
+            "written": write_seq,
+            "overwrites": int(self.ctrl[CTRL_OVERWRITES]),
+            "drops": int(self.ctrl[CTRL_DROPS]),
+        }
+
+    def close(self) -> None:
+        # Drop the NumPy views before closing the mapping. A frame handed out
+        # by read() may still be referenced by the caller; the mapping then
+        # stays until that view is gone (at the latest, process exit), but the
+        # segment is still unlinked.
+        del self.ctrl, self.seqs, self.stamps, self.frames
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+        finally:
+            if self.owner:
+                self.shm.unlink()
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.db import models
 from app.deps import get_db, get_current_user, require_admin
+from app.runtime.supervisor import supervisor
 from app.schemas import CameraCreate, CameraOut, CameraUpdate
 
 
@@ -24,6 +25,7 @@ def create_camera(data: CameraCreate, db: Session = Depends(get_db)):
     db.add(cam)
     db.commit()
     db.refresh(cam)
+    supervisor.request_rebalance()
     return cam
 
 
@@ -37,6 +39,7 @@ def update_camera(camera_id: int, data: CameraUpdate, db: Session = Depends(get_
         setattr(cam, key, value)
     db.commit()
     db.refresh(cam)
+    supervisor.request_rebalance()
     return cam
 
 
@@ -48,4 +51,5 @@ def delete_camera(camera_id: int, db: Session = Depends(get_db)):
     db.query(models.Event).filter(models.Event.camera_id == camera_id).update({"camera_id": None})
     db.delete(cam)
     db.commit()
+    supervisor.request_rebalance()
     return {"status": "ok"}
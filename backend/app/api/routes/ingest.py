@@ -2,18 +2,18 @@ import os
 import json
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.config import Settings
 from app.db import models
 from app.deps import get_db
-from app.integrations.discord_notifier import DiscordNotifier
+from app.integrations.dispatcher import dispatcher
 from app.ws import ws_manager
 
 
 router = APIRouter()
 cfg = Settings()
-discord_notifier = DiscordNotifier(cfg)
 
 
 def get_severity(confidence: float) -> str:
@@ -47,15 +47,24 @@ def to_public_clip_url(filename: str | None) -> str | None:
     return f"{cfg.public_base_url.rstrip('/')}/clips/{filename}"
 
 
-@router.post("/events/ingest")
-async def ingest_event(
-    payload: dict,
-    db: Session = Depends(get_db),
-    x_ingest_key: str | None = Header(default=None),
-):
-    if x_ingest_key != cfg.ingest_key:
-        raise HTTPException(status_code=401, detail="Invalid ingest key")
+def parse_camera_id(value):
+    # JSON may carry the id as a string; the single-event path gets this
+    # coercion from the ORM query.
+    if value is None:
+        return None
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"Invalid camera_id {value!r}")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid camera_id {value!r}") from None
+
+
+def first_enabled_camera(db: Session):
+    return db.query(models.Camera).filter(models.Camera.enabled.is_(True)).order_by(models.Camera.id.asc()).first()
 
+
+def new_event(payload: dict, camera) -> models.Event:
     snapshot_name = None
     clip_name = None
     if payload.get("snapshot_path"):
@@ -63,18 +72,13 @@ async def ingest_event(
     if payload.get("clip_path"):
         clip_name = os.path.basename(payload["clip_path"])
 
-    camera = None
-    if payload.get("camera_id") is not None:
-        camera = db.query(models.Camera).filter(models.Camera.id == payload["camera_id"]).first()
-    if not camera:
-        camera = db.query(models.Camera).filter(models.Camera.enabled.is_(True)).order_by(models.Camera.id.asc()).first()
-    camera_id = camera.id if camera else payload.get("camera_id")
+    camera_id = camera.id if camera else parse_camera_id(payload.get("camera_id"))
     if camera and not camera.enabled:
         raise HTTPException(status_code=400, detail="Camera is disabled")
     confidence = float(payload.get("confidence", 0.0))
     severity = payload.get("severity") or get_severity(confidence)
 
-    ev = models.Event(
+    return models.Event(
         user_id=payload.get("user_id") or (camera.owner_user_id if camera else None),
         camera_id=camera_id,
         ts=parse_ts(payload.get("ts")),
@@ -85,41 +89,144 @@ async def ingest_event(
         meta_json=json.dumps(payload.get("meta", {})),
         ack=False,
     )
+
+
+def store_event(payload: dict, db: Session):
+    # Blocking DB work; runs in the threadpool so the event loop stays free.
+    camera = None
+    if payload.get("camera_id") is not None:
+        camera = db.query(models.Camera).filter(models.Camera.id == payload["camera_id"]).first()
+    if not camera:
+        camera = first_enabled_camera(db)
+    ev = new_event(payload, camera)
     db.add(ev)
     db.commit()
     db.refresh(ev)
+    return ev, camera.name if camera else None
+
+
+def store_events(payloads: list, db: Session):
+    # One camera query, one flush and one commit for the whole batch. Events
+    # that fail validation are reported per index and do not fail the rest.
+    camera_ids = {}
+    bad_ids = {}
+    for i, payload in enumerate(payloads):
+        if isinstance(payload, dict):
+            try:
+                camera_ids[i] = parse_camera_id(payload.get("camera_id"))
+            except ValueError as exc:
+                bad_ids[i] = str(exc)
+    ids = {c for c in camera_ids.values() if c is not None}
+    cameras = {}
+    if ids:
+        cameras = {c.id: c for c in db.query(models.Camera).filter(models.Camera.id.in_(ids)).all()}
+    fallback = []
+
+    results = []
+    stored = []
+    for i, payload in enumerate(payloads):
+        if not isinstance(payload, dict):
+            results.append({"index": i, "status": "error", "detail": "Event must be an object"})
+            continue
+        if i in bad_ids:
+            results.append({"index": i, "status": "error", "detail": bad_ids[i]})
+            continue
+        camera = cameras.get(camera_ids[i])
+        if camera is None:
+            if not fallback:
+                fallback.append(first_enabled_camera(db))
+            camera = fallback[0]
+        try:
+            ev = new_event(payload, camera)
+        except HTTPException as exc:
+            results.append({"index": i, "status": "error", "detail": exc.detail})
+            continue
+        except (TypeError, ValueError) as exc:
+            results.append({"index": i, "status": "error", "detail": str(exc)})
+            continue
+        result = {"index": i, "status": "ok"}
+        results.append(result)
+        stored.append((result, ev, camera.name if camera else None))
+
+    db.add_all([ev for _, ev, _ in stored])
+    db.flush()
+    # Build everything from the flushed rows now; after commit each access would reload.
+    out = []
+    for result, ev, camera_name in stored:
+        result["event_id"] = ev.id
+        out.append((event_message(ev), notification_for(ev, camera_name)))
+    db.commit()
+    return results, out
+
+
+def event_message(ev) -> dict:
+    return {
+        "type": "fall_event",
+        "event_id": ev.id,
+        "user_id": ev.user_id,
+        "camera_id": ev.camera_id,
+        "ts": ev.ts.isoformat(),
+        "confidence": ev.confidence,
+        "severity": ev.severity,
+        "status": "new",
+        "snapshot_url": f"/clips/{ev.snapshot_path}" if ev.snapshot_path else None,
+        "clip_url": f"/clips/{ev.clip_path}" if ev.clip_path else None,
+    }
+
+
+def notification_for(ev, camera_name: str | None) -> dict:
+    return {
+        "key": ev.camera_id,
+        "event_id": ev.id,
+        "camera_name": camera_name,
+        "ts": ev.ts,
+        "severity": ev.severity,
+        "confidence": ev.confidence,
+        "snapshot_file_path": os.path.join(cfg.snapshots_dir, ev.snapshot_path) if ev.snapshot_path else None,
+        "clip_file_path": os.path.join(cfg.clips_dir, ev.clip_path) if ev.clip_path else None,
+        "snapshot_url": to_public_clip_url(ev.snapshot_path),
+        "clip_url": to_public_clip_url(ev.clip_path),
+    }
 
-    snapshot_url = f"/clips/{ev.snapshot_path}" if ev.snapshot_path else None
-    clip_url = f"/clips/{ev.clip_path}" if ev.clip_path else None
-    snapshot_file_path = os.path.join(cfg.snapshots_dir, ev.snapshot_path) if ev.snapshot_path else None
-    clip_file_path = os.path.join(cfg.clips_dir, ev.clip_path) if ev.clip_path else None
-    snapshot_public_url = to_public_clip_url(ev.snapshot_path)
-    clip_public_url = to_public_clip_url(ev.clip_path)
-    await ws_manager.broadcast(
-        {
-            "type": "fall_event",
-            "event_id": ev.id,
-            "user_id": ev.user_id,
-            "camera_id": ev.camera_id,
-            "ts": ev.ts.isoformat(),
-            "confidence": ev.confidence,
-            "severity": ev.severity,
-            "status": "new",
-            "snapshot_url": snapshot_url,
-            "clip_url": clip_url,
-        }
-    )
 
-    discord_notifier.notify_fall_event(
-        event_id=ev.id,
-        camera_name=camera.name if camera else None,
-        ts=ev.ts,
-        severity=ev.severity,
-        confidence=ev.confidence,
-        snapshot_file_path=snapshot_file_path,
-        clip_file_path=clip_file_path,
-        snapshot_url=snapshot_public_url,
-        clip_url=clip_public_url,
-    )
+@router.post("/events/ingest")
+async def ingest_event(
+    payload: dict,
+    db: Session = Depends(get_db),
+    x_ingest_key: str | None = Header(default=None),
+):
+    if x_ingest_key != cfg.ingest_key:
+        raise HTTPException(status_code=401, detail="Invalid ingest key")
+
+    ev, camera_name = await run_in_threadpool(store_event, payload, db)
+    message = event_message(ev)
+    await ws_manager.broadcast(message)
+    # Queued only; delivery happens on the dispatcher threads.
+    dispatcher.submit("discord", **notification_for(ev, camera_name))
+
+    return {
+        "status": "ok",
+        "event_id": ev.id,
+        "snapshot_url": message["snapshot_url"],
+        "clip_url": message["clip_url"],
+    }
+
+
+@router.post("/events/ingest/batch")
+async def ingest_events(
+    payload: list,
+    db: Session = Depends(get_db),
+    x_ingest_key: str | None = Header(default=None),
+):
+    if x_ingest_key != cfg.ingest_key:
+        raise HTTPException(status_code=401, detail="Invalid ingest key")
+    if len(payload) > cfg.ingest_batch_max:
+        raise HTTPException(status_code=413, detail=f"At most {cfg.ingest_batch_max} events per batch")
+
+    results, stored = await run_in_threadpool(store_events, payload, db)
+    if stored:
+        await ws_manager.broadcast_many([message for message, _ in stored])
+    for _, notification in stored:
+        dispatcher.submit("discord", **notification)
 
-    return {"status": "ok", "event_id": ev.id, "snapshot_url": snapshot_url, "clip_url": clip_url}
+    return {"status": "ok", "stored": len(stored), "results": results}
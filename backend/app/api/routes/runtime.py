@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.routes.settings import read_settings, settings_version
+from app.config import Settings
+from app.deps import get_db, require_admin
+from app.integrations.dispatcher import dispatcher
+from app.runtime.supervisor import supervisor
+
+
+router = APIRouter()
+cfg = Settings()
+
+
+@router.post("/runtime/heartbeat")
+def worker_heartbeat(payload: dict, x_ingest_key: str | None = Header(default=None)):
+    if x_ingest_key != cfg.ingest_key:
+        raise HTTPException(status_code=401, detail="Invalid ingest key")
+    if not supervisor.heartbeat(payload):
+        raise HTTPException(status_code=404, detail="Unknown worker")
+    return {"status": "ok"}
+
+
+@router.get("/runtime/workers", dependencies=[Depends(require_admin)])
+def list_workers():
+    return supervisor.status()
+
+
+@router.get("/runtime/notifications", dependencies=[Depends(require_admin)])
+def notification_status():
+    return dispatcher.status()
+
+
+@router.get("/runtime/settings")
+def worker_settings(
+    since: int = -1,
+    x_ingest_key: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    # Workers poll with the last version they applied; only a change costs a full read.
+    if x_ingest_key != cfg.ingest_key:
+        raise HTTPException(status_code=401, detail="Invalid ingest key")
+    version = settings_version(db)
+    # Version 0: never saved, so there is nothing to push over worker env config.
+    if version == since or version == 0:
+        return {"version": version, "settings": None}
+    return {"version": version, "settings": read_settings(db)}
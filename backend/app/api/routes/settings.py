@@ -11,6 +11,8 @@ router = APIRouter()
 
 
 DEFAULTS = SettingsPayload().model_dump()
+# Bumped on every PUT so realtime workers can poll cheaply for changes.
+VERSION_KEY = "_version"
 
 
 def read_settings(db: Session) -> dict:
@@ -30,6 +32,11 @@ def read_settings(db: Session) -> dict:
     return merged
 
 
+def settings_version(db: Session) -> int:
+    row = db.query(models.Setting).filter(models.Setting.key == VERSION_KEY).first()
+    return int(row.value) if row else 0
+
+
 @router.get("/settings", response_model=SettingsPayload, dependencies=[Depends(require_admin)])
 def get_settings(db: Session = Depends(get_db)):
     return SettingsPayload(**read_settings(db))
@@ -46,5 +53,11 @@ def update_settings(data: SettingsPayload, db: Session = Depends(get_db)):
         else:
             row.value = str(value)
             row.updated_at = datetime.utcnow()
+    version = db.query(models.Setting).filter(models.Setting.key == VERSION_KEY).first()
+    if not version:
+        db.add(models.Setting(key=VERSION_KEY, value="1"))
+    else:
+        version.value = str(int(version.value) + 1)
+        version.updated_at = datetime.utcnow()
     db.commit()
     return data
@@ -42,6 +42,7 @@ class Settings:
     admin_pass: str = os.getenv("ADMIN_PASS", "admin123")
 
     ingest_key: str = os.getenv("INGEST_KEY", "ingest-secret")
+    ingest_batch_max: int = int(os.getenv("INGEST_BATCH_MAX", "500"))
     public_base_url: str = os.getenv("PUBLIC_BASE_URL", "http://localhost:8000")
     discord_notify_enabled: bool = os.getenv("DISCORD_NOTIFY_ENABLED", "false").lower() == "true"
     discord_api_base: str = os.getenv("DISCORD_API_BASE", "https://discord.com/api/v10")
@@ -51,6 +52,23 @@ class Settings:
     discord_log_errors: bool = os.getenv("DISCORD_LOG_ERRORS", "true").lower() == "true"
     discord_attach_media: bool = os.getenv("DISCORD_ATTACH_MEDIA", "true").lower() == "true"
     discord_max_file_mb: int = int(os.getenv("DISCORD_MAX_FILE_MB", "8"))
+    notify_workers: int = int(os.getenv("NOTIFY_WORKERS", "2"))
+    notify_queue_size: int = int(os.getenv("NOTIFY_QUEUE_SIZE", "200"))
+    notify_max_retries: int = int(os.getenv("NOTIFY_MAX_RETRIES", "3"))
+    notify_backoff_max_sec: float = float(os.getenv("NOTIFY_BACKOFF_MAX_SEC", "30"))
+    # Alerts from one camera within this window are merged into one message.
+    notify_coalesce_sec: float = float(os.getenv("NOTIFY_COALESCE_SEC", "10"))
+    # Clips over DISCORD_MAX_FILE_MB are sent as a short ffmpeg preview.
+    ffmpeg_bin: str = os.getenv("FFMPEG_BIN", "ffmpeg")
+    discord_preview_width: int = int(os.getenv("DISCORD_PREVIEW_WIDTH", "480"))
+    discord_preview_max_sec: float = float(os.getenv("DISCORD_PREVIEW_MAX_SEC", "10"))
 
     enable_realtime: bool = os.getenv("ENABLE_REALTIME", "true").lower() == "true"
+    realtime_workers: int = int(os.getenv("REALTIME_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    realtime_heartbeat_timeout_sec: float = float(os.getenv("REALTIME_HEARTBEAT_TIMEOUT_SEC", "30"))
+    realtime_startup_grace_sec: float = float(os.getenv("REALTIME_STARTUP_GRACE_SEC", "120"))
+    realtime_backoff_max_sec: float = float(os.getenv("REALTIME_BACKOFF_MAX_SEC", "60"))
+    # How long a worker gets to finish its clips and spool events after SIGTERM.
+    realtime_stop_grace_sec: float = float(os.getenv("REALTIME_STOP_GRACE_SEC", "20"))
+    realtime_preview_base_port: int = int(os.getenv("REALTIME_PREVIEW_BASE_PORT", "8765"))
     frontend_dist: str = os.getenv("FRONTEND_DIST", "../frontend/dist")
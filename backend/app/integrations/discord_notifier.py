@@ -2,12 +2,130 @@ from __future__ import annotations
 
 import json
 import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import requests
 
 from app.config import Settings
+from app.integrations.retry import RetryAfter
+
+
+SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+# Below this no transcode can fit a useful preview, so ffmpeg is not tried.
+MIN_PREVIEW_BYTES = 256 * 1024
+# How soon an alert waiting on its preview transcode is tried again.
+PREVIEW_POLL_SEC = 1.0
+
+
+class RateLimitBuckets:
+    # Tracks Discord's per-route buckets from the X-RateLimit-* headers and
+    # 429 replies, so senders hold off until the reset instead of hammering
+    # the API.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._remaining: dict[str, int] = {}
+        self._reset_at: dict[str, float] = {}
+        self._global_until = 0.0
+        self.limited = 0
+        self.waited_sec = 0.0
+
+    def acquire(self, route: str) -> float:
+        # Takes a request from the bucket and returns 0, or returns how many
+        # seconds to hold off; nothing is taken then.
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._global_until - now, 0.0)
+            if self._remaining.get(route, 1) <= 0:
+                wait = max(wait, self._reset_at.get(route, 0.0) - now)
+            if wait > 0:
+                self.waited_sec += wait
+                return wait
+            if route in self._remaining:
+                self._remaining[route] -= 1
+            return 0.0
+
+    def update(self, route: str, resp: requests.Response) -> None:
+        headers = resp.headers
+        now = time.monotonic()
+        with self._lock:
+            if "X-RateLimit-Remaining" in headers:
+                self._remaining[route] = int(float(headers["X-RateLimit-Remaining"]))
+            if "X-RateLimit-Reset-After" in headers:
+                self._reset_at[route] = now + float(headers["X-RateLimit-Reset-After"])
+            if resp.status_code != 429:
+                return
+            self.limited += 1
+            retry_after = float(headers.get("Retry-After", 1))
+            try:
+                body = resp.json()
+                retry_after = float(body.get("retry_after", retry_after))
+                is_global = bool(body.get("global")) or headers.get("X-RateLimit-Global") == "true"
+            except ValueError:
+                is_global = headers.get("X-RateLimit-Global") == "true"
+            if is_global:
+                self._global_until = now + retry_after
+            else:
+                self._remaining[route] = 0
+                self._reset_at[route] = now + retry_after
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"rate_limited": self.limited, "rate_wait_sec": round(self.waited_sec, 2)}
+
+
+def make_clip_preview(cfg: Settings, clip_path: str, max_bytes: int) -> str | None:
+    # A short, downscaled copy that fits the upload limit. Needs ffmpeg; the
+    # preview is kept next to the clip so retries reuse it.
+    if os.path.getsize(clip_path) <= max_bytes:
+        return clip_path
+    if max_bytes < MIN_PREVIEW_BYTES:
+        return None
+    ffmpeg = shutil.which(cfg.ffmpeg_bin)
+    if not ffmpeg:
+        return None
+    preview_dir = os.path.join(os.path.dirname(clip_path), "previews")
+    os.makedirs(preview_dir, exist_ok=True)
+    out = os.path.join(preview_dir, os.path.splitext(os.path.basename(clip_path))[0] + "_preview.mp4")
+    if os.path.exists(out) and os.path.getsize(out) <= max_bytes:
+        return out
+    # Second attempt trades more quality for size.
+    for width, crf in ((cfg.discord_preview_width, 30), (cfg.discord_preview_width * 2 // 3, 36)):
+        cmd = [
+            ffmpeg,
+            "-y",
+            "-loglevel",
+            "error",
+            "-i",
+            clip_path,
+            "-t",
+            str(cfg.discord_preview_max_sec),
+            "-vf",
+            f"scale={width}:-2,fps=12",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-crf",
+            str(crf),
+            "-an",
+            "-movflags",
+            "+faststart",
+            out,
+        ]
+        try:
+            subprocess.run(cmd, check=True, timeout=60, capture_output=True)
+        except (subprocess.SubprocessError, OSError) as exc:
+            print(f"[discord] preview transcode failed: {exc}")
+            return None
+        if os.path.getsize(out) <= max_bytes:
+            return out
+    return None
 
 
 class DiscordNotifier:
@@ -18,6 +136,61 @@ class DiscordNotifier:
             and bool(cfg.discord_bot_token.strip())
             and bool(cfg.discord_channel_id.strip())
         )
+        self.buckets = RateLimitBuckets()
+        self.previews = 0
+        # ffmpeg runs here, never on a dispatcher thread: an alert waiting on
+        # its preview is requeued until the transcode is done.
+        self._transcoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="discord-preview")
+        self._transcodes: dict[tuple[str, int], Future] = {}
+        self._transcodes_lock = threading.Lock()
+        # One keep-alive session per dispatcher thread.
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers["Authorization"] = f"Bot {self.cfg.discord_bot_token}"
+            self._local.session = session
+        return session
+
+    def _post(self, url: str, timeout: float, **kwargs) -> requests.Response:
+        wait = self.buckets.acquire(url)
+        if wait > 0:
+            raise RetryAfter(wait, "rate limited")
+        resp = self._session().post(url, timeout=timeout, **kwargs)
+        self.buckets.update(url, resp)
+        return resp
+
+    def _clip_preview(self, clip_path: str, budget: int) -> str | None:
+        if os.path.getsize(clip_path) <= budget:
+            return clip_path
+        key = (clip_path, budget)
+        with self._transcodes_lock:
+            future = self._transcodes.get(key)
+            if future is None:
+                future = self._transcoder.submit(make_clip_preview, self.cfg, clip_path, budget)
+                self._transcodes[key] = future
+        if not future.done():
+            raise RetryAfter(PREVIEW_POLL_SEC, "preview transcoding")
+        with self._transcodes_lock:
+            self._transcodes.pop(key, None)
+        try:
+            return future.result()
+        except OSError as exc:
+            print(f"[discord] preview failed: {exc}")
+            return None
+
+    def close(self) -> None:
+        self._transcoder.shutdown(wait=False, cancel_futures=True)
+
+    def _done(self, resp: requests.Response, what: str) -> bool:
+        # Rate limits and server errors are worth another try; other failures are not.
+        if resp.status_code < 300:
+            return True
+        if self.cfg.discord_log_errors:
+            print(f"[discord] {what} failed status={resp.status_code} body={resp.text[:300]}")
+        return not (resp.status_code == 429 or resp.status_code >= 500)
 
     def _format_time(self, ts: datetime) -> str:
         base = ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc)
@@ -28,30 +201,44 @@ class DiscordNotifier:
         local = base.astimezone(zone)
         return local.strftime("%Y-%m-%d %H:%M:%S")
 
-    def notify_fall_event(
-        self,
-        *,
-        event_id: int,
-        camera_name: str | None,
-        ts: datetime,
-        severity: str,
-        confidence: float,
-        snapshot_file_path: str | None,
-        clip_file_path: str | None,
-        snapshot_url: str | None,
-        clip_url: str | None,
-    ) -> None:
-        if not self.enabled:
-            return
-
-        lines = [
-            ":rotating_light: **FALL ALERT**",
-            f"Event ID: `{event_id}`",
-            f"Camera: `{camera_name or 'Unknown'}`",
-            f"Time: `{self._format_time(ts)}`",
-            f"Severity: `{severity}`",
-            f"Confidence: `{confidence:.2f}`",
-        ]
+    def stats(self) -> dict:
+        return {**self.buckets.stats(), "previews": self.previews}
+
+    def notify_fall_event(self, **event) -> bool:
+        return self.notify_fall_events([event])
+
+    def notify_fall_events(self, events: list[dict]) -> bool:
+        # One message for a burst from the same camera: every event is listed,
+        # media comes from the most severe (latest on ties). Returns False when
+        # the send should be retried.
+        if not self.enabled or not events:
+            return True
+
+        lead = max(events, key=lambda e: (SEVERITY_RANK.get(e["severity"], 0), e["ts"]))
+        if len(events) == 1:
+            lines = [
+                ":rotating_light: **FALL ALERT**",
+                f"Event ID: `{lead['event_id']}`",
+                f"Camera: `{lead['camera_name'] or 'Unknown'}`",
+                f"Time: `{self._format_time(lead['ts'])}`",
+                f"Severity: `{lead['severity']}`",
+                f"Confidence: `{lead['confidence']:.2f}`",
+            ]
+        else:
+            lines = [
+                f":rotating_light: **FALL ALERT x{len(events)}**",
+                f"Camera: `{lead['camera_name'] or 'Unknown'}`",
+            ]
+            for e in sorted(events, key=lambda e: e["ts"]):
+                lines.append(
+                    f"- `{e['event_id']}` {self._format_time(e['ts'])} "
+                    f"{e['severity']} ({e['confidence']:.2f})"
+                )
+
+        snapshot_file_path = lead["snapshot_file_path"]
+        clip_file_path = lead["clip_file_path"]
+        snapshot_url = lead["snapshot_url"]
+        clip_url = lead["clip_url"]
         max_bytes = max(self.cfg.discord_max_file_mb, 1) * 1024 * 1024
         media_files: list[tuple[str, str]] = []
         link_fallbacks: list[str] = []
@@ -62,13 +249,23 @@ class DiscordNotifier:
             elif snapshot_url:
                 link_fallbacks.append(f"Image: {snapshot_url}")
 
-        if self.cfg.discord_attach_media and clip_file_path:
-            if os.path.exists(clip_file_path) and os.path.getsize(clip_file_path) <= max_bytes:
-                media_files.append(("video", clip_file_path))
+        if self.cfg.discord_attach_media and clip_file_path and os.path.exists(clip_file_path):
+            # Leave room for the snapshot in the same upload.
+            budget = max_bytes - sum(os.path.getsize(p) for _, p in media_files)
+            preview = self._clip_preview(clip_file_path, budget)
+            if preview:
+                if preview != clip_file_path:
+                    self.previews += 1
+                media_files.append(("video", preview))
+                if preview != clip_file_path and clip_url:
+                    link_fallbacks.append(f"Full video: {clip_url}")
             elif clip_url:
                 link_fallbacks.append(f"Video: {clip_url}")
+        elif clip_url and self.cfg.discord_attach_media:
+            link_fallbacks.append(f"Video: {clip_url}")
 
         if not media_files:
+            link_fallbacks = []
             if snapshot_url:
                 link_fallbacks.append(f"Image: {snapshot_url}")
             if clip_url:
@@ -76,7 +273,6 @@ class DiscordNotifier:
 
         lines.extend(link_fallbacks)
         content = "\n".join(lines)
-        headers = {"Authorization": f"Bot {self.cfg.discord_bot_token}"}
         url = (
             f"{self.cfg.discord_api_base.rstrip('/')}/channels/"
             f"{self.cfg.discord_channel_id}/messages"
@@ -93,13 +289,11 @@ class DiscordNotifier:
                     open_files.append(file_obj)
                     filename = os.path.basename(path)
                     files_payload.append((f"files[{idx}]", (filename, file_obj)))
-                resp = requests.post(url, data=data, files=files_payload, headers=headers, timeout=15)
-                if self.cfg.discord_log_errors and resp.status_code >= 300:
-                    print(
-                        f"[discord] media send failed status={resp.status_code} "
-                        f"body={resp.text[:300]}"
-                    )
-                return
+                resp = self._post(url, 15, data=data, files=files_payload)
+                if resp.status_code < 300 or resp.status_code == 429:
+                    return self._done(resp, "media send")
+                # Otherwise fall back to a text-only message.
+                self._done(resp, "media send")
             except requests.RequestException as exc:
                 if self.cfg.discord_log_errors:
                     print(f"[discord] media send exception: {exc}")
@@ -108,13 +302,9 @@ class DiscordNotifier:
                     f.close()
 
         try:
-            resp = requests.post(url, json={"content": content}, headers=headers, timeout=6)
-            if self.cfg.discord_log_errors and resp.status_code >= 300:
-                print(
-                    f"[discord] send failed status={resp.status_code} "
-                    f"body={resp.text[:300]}"
-                )
+            resp = self._post(url, 6, json={"content": content})
+            return self._done(resp, "send")
         except requests.RequestException as exc:
-            # Event ingest must stay successful even if Discord send fails.
             if self.cfg.discord_log_errors:
                 print(f"[discord] send exception: {exc}")
+            return False
@@ -0,0 +1,220 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+from app.config import Settings
+from app.integrations.discord_notifier import DiscordNotifier
+from app.integrations.retry import RetryAfter
+
+
+@dataclass
+class ChannelMetrics:
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=500))
+
+    def as_dict(self) -> dict:
+        lat = sorted(self.latencies)
+        if lat:
+            p50 = lat[len(lat) // 2] * 1000
+            p95 = lat[min(int(len(lat) * 0.95), len(lat) - 1)] * 1000
+        else:
+            p50 = p95 = 0.0
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "latency_ms_p50": round(p50, 1),
+            "latency_ms_p95": round(p95, 1),
+        }
+
+
+class NotificationDispatcher:
+    # Ingest hands notifications to a bounded queue and returns; worker threads
+    # deliver them with retries and exponential backoff. Senders take a list of
+    # notifications and return True when done (delivered or not worth
+    # retrying), False to retry, or raise RetryAfter to be run again later
+    # without using up an attempt. Retries wait in a not-before heap, never on
+    # a worker thread, so one slow job cannot stall the others.
+    #
+    # With a coalescing window, the first notification for a key (camera) goes
+    # out at once; later ones inside the window are held and sent together
+    # when it closes.
+    def __init__(self, cfg: Settings) -> None:
+        self.cfg = cfg
+        self.coalesce_sec = cfg.notify_coalesce_sec
+        self.senders: dict[str, Callable[[list[dict]], bool]] = {}
+        self.stats_fns: dict[str, Callable[[], dict]] = {}
+        self.closers: list[Callable[[], None]] = []
+        self.metrics: dict[str, ChannelMetrics] = {}
+        self._windows: dict[tuple, dict] = {}
+        self._queue: queue.Queue = queue.Queue(maxsize=cfg.notify_queue_size)
+        # (not_before, seq, channel, items, attempt) for jobs waiting to be retried.
+        self._delayed: list[tuple] = []
+        self._delayed_seq = itertools.count()
+        self._stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def register(self, channel: str, sender, stats=None, close=None) -> None:
+        self.senders[channel] = sender
+        self.metrics[channel] = ChannelMetrics()
+        if stats is not None:
+            self.stats_fns[channel] = stats
+        if close is not None:
+            self.closers.append(close)
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopped.clear()
+        for i in range(max(self.cfg.notify_workers, 1)):
+            t = threading.Thread(target=self._run, name=f"notify-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._flush_windows(force=True)
+        self._stopped.set()
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(max(deadline - time.monotonic(), 0))
+        self._threads = []
+        with self._lock:
+            for _, _, channel, items, _ in self._delayed:
+                self.metrics[channel].failed += 1
+            self._delayed = []
+        for close in self.closers:
+            close()
+
+    def submit(self, channel: str, key=None, **kwargs) -> bool:
+        if channel not in self.senders:
+            return False
+        if key is not None and self.coalesce_sec > 0:
+            now = time.monotonic()
+            with self._lock:
+                window = self._windows.get((channel, key))
+                if window is not None and now < window["until"]:
+                    window["pending"].append(kwargs)
+                    self.metrics[channel].coalesced += 1
+                    return True
+                self._windows[(channel, key)] = {"until": now + self.coalesce_sec, "pending": []}
+        return self._enqueue(channel, [kwargs])
+
+    def _enqueue(self, channel: str, items: list[dict], attempt: int = 0) -> bool:
+        try:
+            self._queue.put_nowait((channel, items, attempt))
+        except queue.Full:
+            with self._lock:
+                self.metrics[channel].dropped += len(items)
+            print(f"[notify] queue full, dropped {len(items)} {channel} notification(s)")
+            return False
+        return True
+
+    def _flush_windows(self, force: bool = False) -> None:
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for k, window in list(self._windows.items()):
+                if not force and now < window["until"]:
+                    continue
+                if window["pending"]:
+                    due.append((k[0], window["pending"]))
+                    # Keep batching while the storm lasts.
+                    self._windows[k] = {"until": now + self.coalesce_sec, "pending": []}
+                else:
+                    del self._windows[k]
+        for channel, items in due:
+            self._enqueue(channel, items)
+
+    def _defer(self, channel: str, items: list[dict], attempt: int, delay: float) -> None:
+        with self._lock:
+            entry = (time.monotonic() + delay, next(self._delayed_seq), channel, items, attempt)
+            heapq.heappush(self._delayed, entry)
+
+    def _release_delayed(self) -> None:
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            while self._delayed and self._delayed[0][0] <= now:
+                _, _, channel, items, attempt = heapq.heappop(self._delayed)
+                due.append((channel, items, attempt))
+        for channel, items, attempt in due:
+            self._enqueue(channel, items, attempt)
+
+    def idle(self) -> bool:
+        with self._lock:
+            return self._queue.unfinished_tasks == 0 and not self._windows and not self._delayed
+
+    def status(self) -> dict:
+        with self._lock:
+            channels = {name: m.as_dict() for name, m in self.metrics.items()}
+        for name, fn in self.stats_fns.items():
+            channels[name].update(fn())
+        with self._lock:
+            delayed = len(self._delayed)
+        return {"queued": self._queue.qsize(), "delayed": delayed, "workers": len(self._threads), "channels": channels}
+
+    def _deliver(self, channel: str, items: list[dict], attempt: int) -> None:
+        sender = self.senders[channel]
+        started = time.monotonic()
+        try:
+            done = sender(items)
+        except RetryAfter as exc:
+            self._defer(channel, items, attempt, exc.delay)
+            return
+        except Exception as exc:
+            print(f"[notify] {channel} sender error: {exc}")
+            done = False
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self.metrics[channel].latencies.append(elapsed)
+            if done:
+                self.metrics[channel].sent += 1
+        if done:
+            return
+        if attempt < self.cfg.notify_max_retries and not self._stopped.is_set():
+            with self._lock:
+                self.metrics[channel].retried += 1
+            delay = min(self.cfg.notify_backoff_max_sec, 2 ** attempt)
+            self._defer(channel, items, attempt + 1, delay)
+            return
+        with self._lock:
+            self.metrics[channel].failed += 1
+
+    def _run(self) -> None:
+        # Keep draining after stop() so queued alerts still go out within the timeout.
+        while True:
+            self._flush_windows()
+            self._release_delayed()
+            try:
+                channel, items, attempt = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._stopped.is_set():
+                    return
+                continue
+            try:
+                self._deliver(channel, items, attempt)
+            finally:
+                self._queue.task_done()
+
+
+def build_dispatcher(cfg: Settings) -> NotificationDispatcher:
+    d = NotificationDispatcher(cfg)
+    discord = DiscordNotifier(cfg)
+    if discord.enabled:
+        d.register("discord", discord.notify_fall_events, discord.stats, discord.close)
+    return d
+
+
+dispatcher = build_dispatcher(Settings())
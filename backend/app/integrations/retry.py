@@ -0,0 +1,8 @@
+class RetryAfter(Exception):
+    # Raised by a sender that cannot go ahead yet (rate limited, media still
+    # transcoding). The dispatcher requeues the job to run after `delay`
+    # seconds instead of waiting on a worker thread, and it does not count
+    # as a failed attempt.
+    def __init__(self, delay: float, reason: str = "") -> None:
+        super().__init__(reason or f"retry after {delay:.2f}s")
+        self.delay = delay
@@ -10,8 +10,9 @@ from app.config import Settings
 from app.db.session import Base, engine, SessionLocal
 from app.db import models
 from app.auth import hash_password
-from app.runtime.realtime_process import RealtimeProcess
-from app.api.routes import health, auth, cameras, events, clips, settings, export, ingest, users
+from app.integrations.dispatcher import dispatcher
+from app.runtime.supervisor import supervisor
+from app.api.routes import health, auth, cameras, events, clips, settings, export, ingest, users, runtime
 from app.api import ws as ws_routes
 
 
@@ -67,7 +68,6 @@ apply_runtime_migrations()
 ensure_admin()
 
 app = FastAPI(title=cfg.app_name)
-realtime_proc = RealtimeProcess()
 
 app.add_middleware(
     CORSMiddleware,
@@ -85,6 +85,7 @@ app.include_router(settings.router)
 app.include_router(export.router)
 app.include_router(ingest.router)
 app.include_router(users.router)
+app.include_router(runtime.router)
 app.include_router(ws_routes.router)
 
 assets_dir = frontend_dist / "assets"
@@ -94,13 +95,15 @@ if assets_dir.is_dir():
 
 @app.on_event("startup")
 def startup_event():
+    dispatcher.start()
     if cfg.enable_realtime:
-        realtime_proc.start()
+        supervisor.start()
 
 
 @app.on_event("shutdown")
 def shutdown_event():
-    realtime_proc.stop()
+    supervisor.stop()
+    dispatcher.stop()
 
 
 @app.get("/")
@@ -113,7 +116,7 @@ def root():
 
 @app.get("/{full_path:path}")
 def spa_fallback(full_path: str):
-    if full_path.startswith(("health", "auth", "users", "cameras", "events", "clips", "settings", "export", "ws")):
+    if full_path.startswith(("health", "auth", "users", "cameras", "events", "clips", "settings", "export", "runtime", "ws")):
         return {"detail": "Not Found"}
     index_path = frontend_dist / "index.html"
     if index_path.is_file():
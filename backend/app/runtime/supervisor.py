@@ -0,0 +1,262 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from app.config import Settings
+from app.db import models
+from app.db.session import SessionLocal
+
+
+@dataclass
+class WorkerState:
+    worker_id: str
+    camera_ids: list[int] = field(default_factory=list)
+    proc: Optional[subprocess.Popen] = None
+    started_at: float = 0.0
+    last_heartbeat: float = 0.0
+    restarts: int = 0
+    next_start: float = 0.0
+    stats: dict = field(default_factory=dict)
+    # Per camera: last reported frame count and when it last advanced.
+    frames: dict[int, int] = field(default_factory=dict)
+    progress_at: dict[int, float] = field(default_factory=dict)
+
+
+class WorkerSupervisor:
+    # Owns the pool of `realtime.py` worker processes: assigns enabled cameras
+    # to workers by load, restarts crashed or silent workers with exponential
+    # backoff, and rebalances when cameras change.
+    def __init__(self, cfg: Settings) -> None:
+        self.cfg = cfg
+        self.project_root = Path(__file__).resolve().parents[3]
+        self.workers: dict[str, WorkerState] = {}
+        # Last reported processing cost per camera (fps * latency), used as load.
+        self.camera_load: dict[int, float] = {}
+        self._lock = threading.RLock()
+        self._rebalance = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._rebalance.set()
+        self._thread = threading.Thread(target=self._run, name="worker-supervisor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread:
+            # A rebalance in flight may be waiting out a worker's grace period.
+            self._thread.join(timeout=self.cfg.realtime_stop_grace_sec + 5)
+        with self._lock:
+            procs = [w.proc for w in self.workers.values()]
+            self.workers = {}
+        self._terminate(procs)
+
+    def request_rebalance(self) -> None:
+        self._rebalance.set()
+
+    def heartbeat(self, payload: dict) -> bool:
+        with self._lock:
+            w = self.workers.get(str(payload.get("worker_id")))
+            if not w:
+                return False
+            now = time.monotonic()
+            w.last_heartbeat = now
+            w.stats = payload
+            for cam in payload.get("cameras", []):
+                camera_id = int(cam["camera_id"])
+                frames = int(cam.get("frames", 0))
+                # A camera the worker is reconnecting is not the worker's fault.
+                if frames != w.frames.get(camera_id) or not cam.get("online", True):
+                    w.progress_at[camera_id] = now
+                w.frames[camera_id] = frames
+                cost = float(cam.get("fps", 0)) * max(float(cam.get("latency_ms", 0)), 1.0)
+                self.camera_load[camera_id] = cost
+            return True
+
+    def status(self) -> list[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "worker_id": w.worker_id,
+                    "pid": w.proc.pid if w.proc else None,
+                    "alive": bool(w.proc and w.proc.poll() is None),
+                    "camera_ids": w.camera_ids,
+                    "restarts": w.restarts,
+                    "heartbeat_age_sec": round(now - w.last_heartbeat, 1) if w.last_heartbeat else None,
+                    "cameras": w.stats.get("cameras", []),
+                }
+                for w in self.workers.values()
+            ]
+
+    def _enabled_camera_ids(self) -> list[int]:
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(models.Camera.id)
+                .filter(models.Camera.enabled.is_(True))
+                .order_by(models.Camera.id.asc())
+                .all()
+            )
+            return [r.id for r in rows]
+        finally:
+            db.close()
+
+    def _assign(self, camera_ids: list[int]) -> dict[str, list[int]]:
+        # Longest-processing-time-first: heaviest camera to the lightest worker.
+        pool = max(1, min(self.cfg.realtime_workers, len(camera_ids)))
+        slots = {f"w{i}": [] for i in range(pool)}
+        loads = {wid: 0.0 for wid in slots}
+        default_load = max(self.camera_load.values(), default=1.0)
+        weighted = sorted(camera_ids, key=lambda c: -self.camera_load.get(c, default_load))
+        for cam in weighted:
+            wid = min(loads, key=loads.get)
+            slots[wid].append(cam)
+            loads[wid] += self.camera_load.get(cam, default_load)
+        return {wid: sorted(cams) for wid, cams in slots.items()}
+
+    def _apply_assignment(self) -> None:
+        camera_ids = self._enabled_camera_ids()
+        # No configured cameras: run the single local camera like before.
+        plan = self._assign(camera_ids) if camera_ids else {"w0": []}
+        # Old workers are stopped outside the lock so heartbeats and status
+        # requests are not held up by the grace period.
+        procs = []
+        changed = []
+        with self._lock:
+            for wid in list(self.workers):
+                if wid not in plan:
+                    procs.append(self.workers.pop(wid).proc)
+            for wid, cams in plan.items():
+                w = self.workers.get(wid)
+                if w and w.camera_ids == cams:
+                    continue
+                if w:
+                    procs.append(w.proc)
+                    w.proc = None
+                else:
+                    w = self.workers[wid] = WorkerState(worker_id=wid)
+                w.camera_ids = cams
+                w.restarts = 0
+                w.next_start = 0.0
+                changed.append(w)
+        # Replacements start only after the old process is gone: they reuse
+        # its preview port, cameras and spool.
+        self._terminate(procs)
+        if self._stopped.is_set():
+            return
+        with self._lock:
+            for w in changed:
+                if self.workers.get(w.worker_id) is w and w.proc is None:
+                    self._spawn(w)
+
+    def _spawn(self, w: WorkerState) -> None:
+        env = os.environ.copy()
+        env.setdefault("BACKEND_URL", "http://127.0.0.1:8000")
+        # The backend runs the detector as a service: no window, preview over HTTP.
+        env.setdefault("HEADLESS", "true")
+        index = int(w.worker_id[1:])
+        env["PREVIEW_PORT"] = str(self.cfg.realtime_preview_base_port + index)
+        env["WORKER_ID"] = w.worker_id
+        env["OUTBOX_PATH"] = f"outbox-{w.worker_id}.db"
+        # Spools of workers dropped when the pool shrinks are replayed by the others.
+        env["OUTBOX_ADOPT"] = "outbox-w*.db"
+        if w.camera_ids:
+            env["RUNTIME_MODE"] = "multi"
+            env["CAMERA_IDS"] = ",".join(str(c) for c in w.camera_ids)
+            if self.cfg.db_url.startswith("sqlite:///"):
+                db_path = Path(self.cfg.db_url[len("sqlite:///"):])
+                if not db_path.is_absolute():
+                    db_path = (Path.cwd() / db_path).resolve()
+                env["CAMERAS_DB"] = str(db_path)
+        cmd = [sys.executable or "python", "realtime.py"]
+        w.proc = subprocess.Popen(cmd, env=env, cwd=str(self.project_root))
+        w.started_at = time.monotonic()
+        w.last_heartbeat = 0.0
+        w.frames = {}
+        w.progress_at = {}
+        print(f"[supervisor] started {w.worker_id} pid={w.proc.pid} cameras={w.camera_ids}")
+
+    def _terminate(self, procs: list[Optional[subprocess.Popen]]) -> None:
+        # Workers close their sessions on SIGTERM, which finishes and spools
+        # any clip being recorded; kill only if that overruns the grace period.
+        # All are signalled first so they share one grace period.
+        procs = [p for p in procs if p is not None and p.poll() is None]
+        for proc in procs:
+            proc.terminate()
+        deadline = time.monotonic() + self.cfg.realtime_stop_grace_sec
+        for proc in procs:
+            try:
+                proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    def _stalled_camera(self, w: WorkerState, now: float) -> Optional[str]:
+        # The heartbeat thread outlives a wedged frame loop, so liveness is
+        # judged by every assigned camera's frame count advancing.
+        timeout = self.cfg.realtime_heartbeat_timeout_sec
+        expected = w.camera_ids or list(w.progress_at)
+        for camera_id in expected:
+            at = w.progress_at.get(camera_id)
+            if at is None:
+                if now - w.started_at > timeout + self.cfg.realtime_startup_grace_sec:
+                    return f"camera {camera_id} missing"
+            elif now - at > timeout:
+                return f"camera {camera_id} made no progress"
+        return None
+
+    def _check(self, w: WorkerState, now: float) -> Optional[subprocess.Popen]:
+        # Returns a stalled worker's process for the caller to stop outside the lock.
+        if w.proc is None:
+            if now >= w.next_start:
+                self._spawn(w)
+            return None
+        proc = None
+        code = w.proc.poll()
+        reason = f"exited code={code}"
+        if code is None:
+            seen = w.last_heartbeat or w.started_at
+            grace = self.cfg.realtime_startup_grace_sec if not w.last_heartbeat else 0
+            if now - seen > self.cfg.realtime_heartbeat_timeout_sec + grace:
+                reason = "stalled"
+            elif w.last_heartbeat:
+                reason = self._stalled_camera(w, now)
+            else:
+                reason = None
+            if reason is None:
+                if w.last_heartbeat and now - w.started_at > self.cfg.realtime_backoff_max_sec:
+                    w.restarts = 0
+                return None
+            proc = w.proc
+        delay = min(self.cfg.realtime_backoff_max_sec, 2 ** w.restarts)
+        print(f"[supervisor] {w.worker_id} {reason}; restart in {delay}s")
+        w.restarts += 1
+        w.proc = None
+        w.next_start = now + delay
+        return proc
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            if self._rebalance.is_set():
+                self._rebalance.clear()
+                try:
+                    self._apply_assignment()
+                except Exception as exc:
+                    print(f"[supervisor] rebalance failed: {exc}")
+            now = time.monotonic()
+            with self._lock:
+                procs = [self._check(w, now) for w in list(self.workers.values())]
+            self._terminate(procs)
+            self._stopped.wait(2.0)
+
+
+supervisor = WorkerSupervisor(Settings())
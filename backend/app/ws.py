@@ -13,23 +13,28 @@ class WSManager:
     def disconnect(self, ws: WebSocket):
         self.active = [conn for conn in self.active if conn["ws"] != ws]
 
+    def _allowed(self, user: dict, message: dict) -> bool:
+        if message.get("type") != "fall_event" or user.get("role") == "admin":
+            return True
+        if message.get("user_id") == user.get("id"):
+            return True
+        return message.get("camera_id") in set(user.get("allowed_camera_ids", []))
+
     async def broadcast(self, message: dict):
+        await self.broadcast_many([message])
+
+    async def broadcast_many(self, messages: List[dict]):
+        # One frame per connection: the message itself when only one is
+        # visible to that user, otherwise a "fall_events" list.
         stale = []
         for conn in list(self.active):
             ws = conn["ws"]
-            user = conn["user"]
-            if message.get("type") == "fall_event" and user.get("role") != "admin":
-                msg_user_id = message.get("user_id")
-                msg_camera_id = message.get("camera_id")
-                allowed_camera_ids = set(user.get("allowed_camera_ids", []))
-                if msg_user_id == user.get("id"):
-                    pass
-                elif msg_camera_id in allowed_camera_ids:
-                    pass
-                else:
-                    continue
+            visible = [m for m in messages if self._allowed(conn["user"], m)]
+            if not visible:
+                continue
+            frame = visible[0] if len(visible) == 1 else {"type": "fall_events", "events": visible}
             try:
-                await ws.send_json(message)
+                await ws.send_json(frame)
             except Exception:
                 stale.append(ws)
         for ws in stale:
@@ -0,0 +1,170 @@
+import argparse
+import dataclasses
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.config import Settings
+from app.integrations.discord_notifier import DiscordNotifier
+from app.integrations.dispatcher import NotificationDispatcher
+
+
+class StandInDiscord(ThreadingHTTPServer):
+    # Enough of POST /channels/<id>/messages to exercise the notifier: a
+    # per-route bucket with X-RateLimit-* headers, 429 + retry_after when it
+    # is exhausted, and a simulated upload bandwidth.
+    daemon_threads = True
+
+    def __init__(self, limit: int, window_sec: float, bandwidth_mbps: float) -> None:
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.limit = limit
+        self.window_sec = window_sec
+        self.bandwidth = bandwidth_mbps * 1024 * 1024 / 8
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.used = 0
+        self.messages = 0
+        self.rejected = 0
+        self.bytes = 0
+
+    def take(self) -> tuple[bool, int, float]:
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= self.window_sec:
+                self.window_start = now
+                self.used = 0
+            reset_after = self.window_sec - (now - self.window_start)
+            if self.used >= self.limit:
+                self.rejected += 1
+                return False, 0, reset_after
+            self.used += 1
+            return True, self.limit - self.used, reset_after
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        server: StandInDiscord = self.server
+        if server.bandwidth > 0:
+            time.sleep(length / server.bandwidth)
+        ok, remaining, reset_after = server.take()
+        if ok:
+            with server.lock:
+                server.messages += 1
+                server.bytes += len(body)
+            payload = json.dumps({"id": str(server.messages)}).encode()
+            self.send_response(200)
+        else:
+            payload = json.dumps({"retry_after": round(reset_after, 3), "global": False}).encode()
+            self.send_response(429)
+            self.send_header("Retry-After", str(round(reset_after, 3)))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-RateLimit-Limit", str(server.limit))
+        self.send_header("X-RateLimit-Remaining", str(remaining))
+        self.send_header("X-RateLimit-Reset-After", str(round(reset_after, 3)))
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def run_bench(args) -> dict:
+    server = StandInDiscord(args.limit, args.window_sec, args.bandwidth_mbps)
+    threading.Thread(target=server.serve_forever, name="discord-standin", daemon=True).start()
+
+    cfg = dataclasses.replace(
+        Settings(),
+        discord_notify_enabled=True,
+        discord_api_base=f"http://127.0.0.1:{server.server_address[1]}",
+        discord_bot_token="bench",
+        discord_channel_id="bench",
+        discord_log_errors=False,
+        discord_attach_media=args.snapshot_kb > 0,
+        notify_coalesce_sec=args.coalesce_sec,
+        notify_max_retries=args.retries,
+    )
+    notifier = DiscordNotifier(cfg)
+    dispatcher = NotificationDispatcher(cfg)
+    dispatcher.register("discord", notifier.notify_fall_events, notifier.stats)
+    dispatcher.start()
+
+    snapshot = None
+    if args.snapshot_kb > 0:
+        fd, snapshot = tempfile.mkstemp(suffix=".jpg")
+        with os.fdopen(fd, "wb") as f:
+            f.write(os.urandom(args.snapshot_kb * 1024))
+
+    started = time.monotonic()
+    submit_ms = []
+    for i in range(args.events):
+        camera_id = i % args.cameras
+        t0 = time.perf_counter()
+        dispatcher.submit(
+            "discord",
+            key=camera_id,
+            event_id=i + 1,
+            camera_name=f"cam-{camera_id}",
+            ts=datetime.now(timezone.utc),
+            severity="high",
+            confidence=0.8,
+            snapshot_file_path=snapshot,
+            clip_file_path=args.clip,
+            snapshot_url=None,
+            clip_url=None,
+        )
+        submit_ms.append((time.perf_counter() - t0) * 1000)
+        if args.interval_ms > 0:
+            time.sleep(args.interval_ms / 1000)
+
+    # Wait for the queue and any open coalescing windows to drain.
+    deadline = time.monotonic() + args.timeout
+    while not dispatcher.idle() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    elapsed = time.monotonic() - started
+    dispatcher.stop()
+    server.shutdown()
+    if snapshot:
+        os.remove(snapshot)
+
+    return {
+        "events": args.events,
+        "cameras": args.cameras,
+        "elapsed_sec": round(elapsed, 2),
+        "submit_ms_max": round(max(submit_ms), 3) if submit_ms else 0.0,
+        "server": {
+            "messages": server.messages,
+            "rejected_429": server.rejected,
+            "mb_received": round(server.bytes / 2**20, 2),
+        },
+        "dispatcher": dispatcher.status()["channels"]["discord"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Discord notifier against a local stand-in server."
+    )
+    parser.add_argument("--events", type=int, default=60)
+    parser.add_argument("--cameras", type=int, default=3)
+    parser.add_argument("--interval-ms", type=float, default=50, help="Gap between submitted events")
+    parser.add_argument("--coalesce-sec", type=float, default=Settings().notify_coalesce_sec)
+    parser.add_argument("--limit", type=int, default=5, help="Messages per bucket window")
+    parser.add_argument("--window-sec", type=float, default=5.0)
+    parser.add_argument("--bandwidth-mbps", type=float, default=20.0, help="0 = unlimited")
+    parser.add_argument("--snapshot-kb", type=int, default=150, help="0 = text-only messages")
+    parser.add_argument("--clip", help="Attach this clip (transcoded if over the size limit)")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+    print(json.dumps(run_bench(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
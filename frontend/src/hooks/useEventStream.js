@@ -9,6 +9,8 @@ export default function useEventStream(onEvent) {
         const payload = JSON.parse(evt.data);
         if (payload.type === "fall_event") {
           onEvent(payload);
+        } else if (payload.type === "fall_events") {
+          payload.events.forEach(onEvent);
         }
       } catch {
         return;
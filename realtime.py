@@ -1,5 +1,16 @@
-from app.runtime.realtime_runner import run_realtime
+from app.runtime.shutdown import install_sigterm_handler
+from app.runtime.startup import StartupTimeline
 
 
 if __name__ == "__main__":
-    run_realtime()
+    install_sigterm_handler()
+    timeline = StartupTimeline()
+    with timeline.phase("imports"):
+        from app.config import Settings
+        from app.runtime.multi_runner import run_multi
+        from app.runtime.realtime_runner import run_realtime
+
+    if Settings().runtime_mode == "multi":
+        run_multi(timeline)
+    else:
+        run_realtime(timeline)
@@ -0,0 +1,5 @@
+from app.runtime.replay import main
+
+
+if __name__ == "__main__":
+    main()